@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'WebGIS.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after setup so the app registry is ready.
+from api import events  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Django only speaks HTTP; the lifespan protocol starts and stops the live event hub.
+    if scope["type"] == "lifespan":
+        await events.lifespan(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
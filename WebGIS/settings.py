@@ -37,6 +37,39 @@ SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = "None"
 SESSION_COOKIE_SECURE = True
 
+# Cache
+# Shared by every worker process and by Celery, so tile entries, session token
+# revocations, replica pins and snapshot debounce marks made in one process are seen
+# by all. REDIS_URL selects Redis (needs the redis package); otherwise the database
+# cache table is used, created by ``manage.py createcachetable``.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        },
+    }
+
+# Cache of X-Session-Token -> user used by require_auth. Every process keeps an LRU of
+# MAX_ENTRIES tokens for LOCAL_TTL seconds, so a hit costs no query. With BACKEND
+# "django" it is backed by CACHES for TTL seconds and invalidations go through them, so
+# a logout or deactivation reaches other processes within LOCAL_TTL. "local" has no
+# shared tier and is only safe with a single process.
+SESSION_TOKEN_CACHE = {
+    "BACKEND": os.getenv('SESSION_TOKEN_CACHE_BACKEND', 'django'),
+    "MAX_ENTRIES": 10000,
+    "TTL": int(os.getenv('SESSION_TOKEN_CACHE_TTL', 60)),
+    "LOCAL_TTL": int(os.getenv('SESSION_TOKEN_CACHE_LOCAL_TTL', 5)),
+}
+
 # CORS settings
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_ALL_ORIGINS = True
@@ -47,6 +80,15 @@ CORS_ALLOW_HEADERS = [
     "Content-Type",
     "Authorization",
     'x-session-token',
+    "If-None-Match",
+    "If-Modified-Since",
+]
+CORS_EXPOSE_HEADERS = [
+    "ETag",
+    "Link",
+    "X-Next-Cursor",
+    "X-Sync-Token",
+    "Server-Timing",
 ]
 
 # Security settings
@@ -70,6 +112,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
     'django.contrib.sites',
 
     # Third-party apps
@@ -87,9 +130,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.RequestTimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "api.middleware.SnapshotWhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -98,6 +143,31 @@ MIDDLEWARE = [
     "allauth.account.middleware.AccountMiddleware",
 ]
 
+# Request timing
+# api.middleware.RequestTimingMiddleware adds Server-Timing headers and logs query
+# counts and latency per route for SAMPLE_RATE of requests. Requests over MAX_QUERIES
+# or SLOW_MS are logged as warnings. Leave HEADER off where clients are untrusted.
+REQUEST_TIMING = {
+    "ENABLED": os.getenv('REQUEST_TIMING_ENABLED', str(DEBUG)) == 'True',
+    "SAMPLE_RATE": float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', 1.0)),
+    "MAX_QUERIES": int(os.getenv('REQUEST_TIMING_MAX_QUERIES', 10)),
+    "SLOW_MS": float(os.getenv('REQUEST_TIMING_SLOW_MS', 500)),
+    "HEADER": os.getenv('REQUEST_TIMING_HEADER', str(DEBUG)) == 'True',
+}
+
+# Metrics
+# api.middleware.MetricsMiddleware counts requests, errors, latency, queries and bytes
+# per route, served at /api/metrics in the Prometheus text format. Under several
+# worker processes set MULTIPROCESS_DIR to a directory shared by the workers (and
+# emptied on deploy) so a scrape of any worker reports all of them. Scrapers send
+# "Authorization: Bearer <TOKEN>"; the endpoint refuses every request until TOKEN is set.
+METRICS = {
+    "ENABLED": os.getenv('METRICS_ENABLED', 'True') == 'True',
+    "MULTIPROCESS_DIR": os.getenv('METRICS_MULTIPROCESS_DIR'),
+    "FLUSH_S": float(os.getenv('METRICS_FLUSH_S', 5)),
+    "TOKEN": os.getenv('METRICS_TOKEN'),
+}
+
 AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
     "allauth.account.auth_backends.AuthenticationBackend",
@@ -150,9 +220,35 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # Seconds to keep a connection open between requests, checked before each reuse.
+        # 0 connects on every request. Under ASGI each sync_to_async thread keeps its own
+        # connection, so size the database's max_connections for the worker threads.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas
+# POSTGRES_REPLICA_HOSTS is a comma-separated list of host[:port] with the same
+# credentials as default. The read-only map and team endpoints go to a random replica
+# (see api.replicas); a session token that wrote is pinned to default for PIN_S seconds,
+# which should exceed the replicas' usual lag. Pins live in CACHES, so share the cache
+# between workers when running several.
+for _i, _host in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(','))):
+    _host, _, _port = _host.strip().partition(':')
+    DATABASES[f'replica_{_i}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+DATABASE_REPLICAS = {
+    "PIN_S": int(os.getenv('DATABASE_REPLICA_PIN_S', 10)),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -202,6 +298,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom user model
 AUTH_USER_MODEL = 'api.CustomUser'
 
+# Logging
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api": {
+            "handlers": ["console"],
+            "level": os.getenv('API_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 # Email settings
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
@@ -210,3 +321,69 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
+
+# Pagination
+# List endpoints are unpaginated unless a limit or cursor is passed. Setting this
+# caps unparameterised requests to a first page of this many rows instead.
+API_DEFAULT_PAGE_SIZE = int(os.getenv('API_DEFAULT_PAGE_SIZE', 0)) or None
+
+# Adoptions
+# Minimum distance in meters between two active adoptions; 0 disables the check.
+# Team leaders may bypass it with ?allow_overlap=true.
+ADOPTION_MIN_SPACING_M = float(os.getenv('ADOPTION_MIN_SPACING_M', 25))
+
+# Vector tiles
+# Tiles up to TILE_CACHE_MAX_ZOOM are cached in CACHES; a write drops only the tiles
+# holding the old and new position of the changed point.
+TILE_CACHE_MAX_ZOOM = int(os.getenv('TILE_CACHE_MAX_ZOOM', 16))
+TILE_CACHE_TIMEOUT = 60 * 60 * 24
+TILE_HTTP_MAX_AGE = int(os.getenv('TILE_HTTP_MAX_AGE', 60))
+
+# Layer snapshots
+# Pre-rendered GeoJSON of the public layers, served by api.middleware.SnapshotWhiteNoiseMiddleware.
+# Writes trigger one rebuild per LAYER_SNAPSHOT_DEBOUNCE_S window; 0 disables automatic rebuilds.
+LAYER_SNAPSHOT_ROOT = os.getenv('LAYER_SNAPSHOT_ROOT', os.path.join(BASE_DIR, 'snapshots'))
+LAYER_SNAPSHOT_URL = '/snapshots/'
+LAYER_SNAPSHOT_DEBOUNCE_S = float(os.getenv('LAYER_SNAPSHOT_DEBOUNCE_S', 30))
+LAYER_SNAPSHOT_KEEP = 3
+
+# Delta sync
+# Tombstones of removed adoptions are kept this long; clients that have not synced
+# for longer are told to reload the whole layer.
+ADOPTION_TOMBSTONE_RETENTION_DAYS = int(os.getenv('ADOPTION_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Live events
+# Backing for /adopted-area-layer/stream/ (see api.events). BACKEND is "postgres"
+# (LISTEN/NOTIFY, reaches every worker) or "memory" (this process only).
+# Subscribers more than QUEUE_SIZE events behind are disconnected and told to resync.
+ADOPTION_EVENTS = {
+    "BACKEND": os.getenv('ADOPTION_EVENTS_BACKEND', 'postgres'),
+    "QUEUE_SIZE": int(os.getenv('ADOPTION_EVENTS_QUEUE_SIZE', 256)),
+    "HEARTBEAT_S": 15,
+}
+
+# Adoption expiry
+# Expired temporary adoptions are switched off in transactions of this many rows.
+ADOPTION_EXPIRY_CHUNK_SIZE = int(os.getenv('ADOPTION_EXPIRY_CHUNK_SIZE', 1000))
+
+# Celery
+# Without a broker, tasks run eagerly in the calling process.
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', '')
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'expire-temporary-adoptions': {
+        'task': 'api.tasks.expire_adoptions',
+        'schedule': float(os.getenv('ADOPTION_EXPIRY_INTERVAL_S', 60 * 60)),
+    },
+    'prune-adoption-tombstones': {
+        'task': 'api.tasks.prune_tombstones',
+        'schedule': 60 * 60 * 24,
+    },
+    # Repairs drift in the statistics rollup from writes that skipped the stats hooks.
+    'reconcile-adoption-stats': {
+        'task': 'api.tasks.reconcile_adoption_stats',
+        'schedule': float(os.getenv('ADOPTION_STATS_RECONCILE_INTERVAL_S', 60 * 60 * 24)),
+    },
+}
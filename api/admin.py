@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, AdoptedArea
+from .models import CustomUser, AdoptedArea, AdoptionStat
+from .search import search_areas
 # from django.contrib.gis.admin import OSMGeoAdmin
 
 
@@ -59,6 +60,16 @@ class AdoptedAreaAdmin(admin.ModelAdmin):
 
     ordering = ('-created_at',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # search_fields only shows the search box; icontains over six columns would scan
+        # the whole table, so use the indexed search of the public API instead.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if "@" in search_term:
+            return queryset.filter(email__iexact=search_term), False
+        return search_areas(queryset, search_term), False
+
     fieldsets = (
         (None, {
             'fields': (
@@ -98,4 +109,18 @@ class AdoptedAreaAdmin(admin.ModelAdmin):
         return "N/A"
 
 
+@admin.register(AdoptionStat)
+class AdoptionStatAdmin(admin.ModelAdmin):
+    list_display = ('country', 'state', 'city', 'adoption_type', 'is_active', 'expired', 'count')
+    list_filter = ('adoption_type', 'is_active', 'expired', 'country')
+    search_fields = ('country', 'state', 'city')
+
+    # Maintained by api.stats; edits here would only be overwritten by the next reconcile.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(CustomUser, CustomUserAdmin)
@@ -0,0 +1,237 @@
+"""Streaming readers and writers for moving AdoptedArea rows in and out in bulk.
+
+Supported formats are CSV (with ``lng``/``lat`` columns), a GeoJSON FeatureCollection
+and newline-delimited GeoJSON features. Readers and writers hold one record at a time
+(plus a small read buffer), so memory stays flat whatever the file size.
+"""
+import csv
+import io
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .adoptions import BULK_CREATE_BATCH_SIZE, adoption_fields, assign_revision, parse_adoption, spacing_errors
+from .geo import Latitude, Longitude
+from .models import AdoptedArea
+from .signals import adopted_areas_bulk_changed
+
+User = get_user_model()
+
+FORMATS = ("csv", "geojson", "ndjson")
+
+EXPORT_COLUMNS = (
+    "id", "area_name", "adoptee_name", "email", "adoption_type", "end_date", "is_active", "note",
+    "lng", "lat", "city", "state", "country", "created_at", "owner_email",
+)
+# Optional CSV cells that fall back to the schema default when left blank.
+BLANK_MEANS_DEFAULT = ("adoption_type", "end_date", "is_active", "note")
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def detect_format(path):
+    for fmt, suffixes in (("ndjson", (".ndjson", ".geojsonl", ".jsonl")), ("geojson", (".geojson", ".json")), ("csv", (".csv",))):
+        if path.lower().endswith(suffixes):
+            return fmt
+    raise ValueError(f"Cannot tell the format of {path}; pass --format.")
+
+
+# -------------------- Reading --------------------
+def iter_geojson_features(stream, chunk_size=1 << 16):
+    """Yield the features of a GeoJSON FeatureCollection without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        key = buffer.find('"features"')
+        start = buffer.find("[", key) if key != -1 else -1
+        if start != -1:
+            break
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            raise ValueError("No features array found in GeoJSON input.")
+        buffer += chunk
+
+    pos = start + 1
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if buffer.startswith("]", pos):
+            return
+        try:
+            feature, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise ValueError("GeoJSON input ends in the middle of a feature.")
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield feature
+
+
+def feature_to_item(feature):
+    item = dict(feature.get("properties") or {})
+    item["location"] = feature.get("geometry")
+    return item
+
+
+def csv_row_to_item(row):
+    item = {
+        key: value
+        for key, value in row.items()
+        if key not in ("lng", "lat") and not (value == "" and key in BLANK_MEANS_DEFAULT)
+    }
+    item["location"] = {"type": "Point", "coordinates": [row.get("lng"), row.get("lat")]}
+    return item
+
+
+def read_items(stream, fmt):
+    """Yield raw adoption dicts (AdoptAreaInput shape, plus an optional owner_email)."""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield csv_row_to_item(row)
+    elif fmt == "geojson":
+        for feature in iter_geojson_features(stream):
+            yield feature_to_item(feature)
+    else:
+        for line in stream:
+            if line.strip():
+                yield feature_to_item(json.loads(line))
+
+
+# -------------------- Importing --------------------
+class OwnerResolver:
+    """Maps owner emails to users, one query per batch of unseen emails."""
+
+    def __init__(self, default_owner=None):
+        self.default_owner = default_owner
+        self._users = {}
+
+    def prefetch(self, items):
+        emails = {(item.get("owner_email") or "").strip().lower() for item in items} - {""} - self._users.keys()
+        if emails:
+            found = {user.email: user for user in User.objects.filter(email__in=emails)}
+            for email in emails:
+                self._users[email] = found.get(email)
+
+    def resolve(self, item):
+        email = (item.get("owner_email") or "").strip().lower()
+        if email:
+            return self._users.get(email)
+        return self.default_owner
+
+
+def build_batch(items, owners, check_spacing=True):
+    """Validate a batch; returns ``(areas, errors)`` where errors are ``(offset, message)`` pairs.
+
+    The spacing rule is checked against the database and within the batch; earlier
+    batches are already committed, so they count as database rows. Call inside the
+    transaction that inserts the batch.
+    """
+    owners.prefetch(items)
+    candidates = []
+    errors = []
+    for offset, item in enumerate(items):
+        data, error = parse_adoption(item)
+        owner = owners.resolve(item) if data else None
+        if data and owner is None:
+            error = "No owner: set owner_email to an existing user or pass --owner."
+        if error:
+            errors.append((offset, error))
+            continue
+        candidates.append((offset, AdoptedArea(user=owner, **adoption_fields(data))))
+
+    conflicts = spacing_errors(candidates) if check_spacing else {}
+    errors.extend(conflicts.items())
+    errors.sort()
+    return [area for offset, area in candidates if offset not in conflicts], errors
+
+
+COPY_COLUMNS = (
+    "user_id", "area_name", "adoptee_name", "email", "adoption_type", "end_date", "is_active", "note",
+    "location", "city", "state", "country", "created_at", "updated_at", "revision",
+)
+
+
+def copy_areas(areas):
+    """Insert with PostgreSQL COPY; much faster than INSERT but does not return ids."""
+    created_at = now()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for area in areas:
+        # Set on the instances too: the statistics rollup reads updated_at.
+        area.created_at = area.updated_at = created_at
+        writer.writerow([
+            area.user_id, area.area_name, area.adoptee_name, area.email, area.adoption_type,
+            area.end_date or r"\N", area.is_active, area.note, area.location.ewkt,
+            area.city, area.state, area.country, created_at.isoformat(), created_at.isoformat(), area.revision,
+        ])
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f"COPY {AdoptedArea._meta.db_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+
+
+def insert_areas(areas, use_copy=False):
+    with transaction.atomic():
+        assign_revision(areas)
+        if use_copy:
+            copy_areas(areas)
+        else:
+            AdoptedArea.objects.bulk_create(areas, batch_size=BULK_CREATE_BATCH_SIZE)
+        adopted_areas_bulk_changed.send(sender=AdoptedArea, areas=areas, action="create")
+
+
+def copy_available():
+    return connection.vendor == "postgresql"
+
+
+# -------------------- Exporting --------------------
+def export_rows(areas, chunk_size=5000):
+    """Stream ``EXPORT_COLUMNS`` dicts through a server-side cursor."""
+    return (
+        areas.annotate(lng=Longitude("location"), lat=Latitude("location"))
+        .values(*EXPORT_COLUMNS[:-1], owner_email=F("user__email"))
+        .order_by("id")
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def export_feature(row):
+    row = dict(row)
+    lng, lat = row.pop("lng"), row.pop("lat")
+    return {
+        "type": "Feature",
+        "id": row["id"],
+        "geometry": {"type": "Point", "coordinates": [lng, lat]},
+        "properties": row,
+    }
+
+
+def write_rows(rows, stream, fmt):
+    """Write export rows to ``stream``; returns how many were written."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == "ndjson":
+        for row in rows:
+            stream.write(json.dumps(export_feature(row), default=str, separators=(",", ":")) + "\n")
+            count += 1
+    else:
+        stream.write('{"type":"FeatureCollection","features":[\n')
+        for row in rows:
+            if count:
+                stream.write(",\n")
+            stream.write(json.dumps(export_feature(row), default=str, separators=(",", ":")))
+            count += 1
+        stream.write("\n]}\n")
+    return count
@@ -0,0 +1,106 @@
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from pydantic import ValidationError
+
+from .models import AdoptedArea
+from .proximity import batch_spacing_conflicts
+from .schemas import AdoptAreaInput
+from .signals import adopted_areas_bulk_changed
+from .versions import ADOPTED_AREAS, bump
+
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+def adoption_error(data):
+    """Rules that go beyond the AdoptAreaInput schema; returns a message or None."""
+    if data.adoption_type == "temporary" and not data.end_date:
+        return "end_date is required for temporary adoption."
+    return None
+
+
+def adoption_fields(data):
+    """Model field values for a validated AdoptAreaInput."""
+    lng, lat = data.location.coordinates
+    return {
+        "area_name": data.area_name.strip(),
+        "adoptee_name": data.adoptee_name.strip(),
+        "email": str(data.email),
+        "adoption_type": data.adoption_type,
+        "end_date": data.end_date,
+        "is_active": data.is_active,
+        "note": data.note.strip(),
+        "location": Point(lng, lat, srid=4326),
+        "city": data.city.strip(),
+        "state": data.state.strip(),
+        "country": data.country.strip(),
+    }
+
+
+def validation_message(error):
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+        for err in error.errors()
+    )
+
+
+def parse_adoption(item):
+    """Validate one raw item; returns ``(data, None)`` or ``(None, message)``."""
+    try:
+        data = AdoptAreaInput.model_validate(item)
+    except ValidationError as e:
+        return None, validation_message(e)
+    error = adoption_error(data)
+    if error:
+        return None, error
+    return data, None
+
+
+def spacing_errors(areas):
+    """``{key: message}`` for ``(key, area)`` pairs that break the minimum spacing rule.
+
+    Call inside the transaction that inserts the areas.
+    """
+    return batch_spacing_conflicts(
+        [(key, area.location.x, area.location.y) for key, area in areas if area.is_active]
+    )
+
+
+def assign_revision(areas):
+    """Give unsaved areas the next revision; call inside the transaction that inserts them."""
+    revision = bump(ADOPTED_AREAS)
+    for area in areas:
+        area.revision = revision
+    return revision
+
+
+def bulk_adopt(user, items, check_spacing=True):
+    """Validate every item and insert the valid ones in one transaction.
+
+    Returns one result dict per input item, in input order.
+    """
+    results = []
+    candidates = []
+    for index, item in enumerate(items):
+        data, error = parse_adoption(item)
+        if error:
+            results.append({"index": index, "success": False, "message": error})
+            continue
+        candidates.append((index, AdoptedArea(user=user, **adoption_fields(data))))
+        results.append({"index": index, "success": True})
+
+    with transaction.atomic():
+        conflicts = spacing_errors(candidates) if check_spacing else {}
+        for index, message in conflicts.items():
+            results[index].update(success=False, message=message)
+        areas = [area for index, area in candidates if index not in conflicts]
+
+        if areas:
+            assign_revision(areas)
+            AdoptedArea.objects.bulk_create(areas, batch_size=BULK_CREATE_BATCH_SIZE)
+            adopted_areas_bulk_changed.send(sender=AdoptedArea, areas=areas, action="create")
+
+    created = iter(areas)
+    for result in results:
+        if result["success"]:
+            result["id"] = next(created).id
+    return results
@@ -1,40 +1,54 @@
-import functools
 import json
 
+from asgiref.sync import sync_to_async
 from django.db import transaction
-from geojson_pydantic import Point
+from django.contrib.gis.db.models import Collect
+from django.contrib.gis.db.models.functions import Centroid, SnapToGrid
 from django.contrib.gis.geos import GEOSGeometry
-from django.http import JsonResponse
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.crypto import constant_time_compare
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from ninja import NinjaAPI
-from django.contrib.sessions.models import Session
+from ninja import NinjaAPI, Query
 from django.contrib.auth import get_user_model
 from ninja.errors import HttpError
 
+from . import events, metrics, search, snapshots, stats, sync, tiles
+from .adoptions import adoption_error, adoption_fields, bulk_adopt
+from .auth import require_auth
+from .geojson import STREAM_CHUNK_SIZE, astream_feature_collection, dumps, layer_item, layer_rows, layer_values, stream_feature_collection
+from .geo import WORLD_EXTENT, ArraySample, Latitude, Longitude, cluster_cell_count, cluster_cell_size, parse_bbox
 from .models import AdoptedArea, Team
-from .schemas import AdoptAreaInput, AdoptAreaLayer, TeamCreate, TeamOut, LeaderRequest
-from typing import List
+from .pagination import MAX_PAGE_SIZE, apaginate, page_size, set_next_page_headers
+from .proximity import locked_spacing_conflict, nearby_areas
+from .replicas import read_replica
+from .schemas import AdoptAreaBulkInput, AdoptAreaInput, AdoptAreaLayer, AdoptedAreaChanges, AdoptedAreaCluster, AdoptionStatsOut, NearbyAdoptedArea, SearchResults, TeamCreate, TeamOut, TeamCountsOut, LeaderRequest
+from .timing import TimedJSONRenderer
+from .versions import ADOPTED_AREAS, TEAMS, conditional_get
+from typing import List, Literal, Optional, Union
 
 User = get_user_model()
 
+CLUSTER_SAMPLE_SIZE = 10
+MAX_CLUSTER_CELLS = 5000
+MAX_NEARBY_RADIUS_M = 100_000
+MAX_NEARBY_LIMIT = 200
+
 api = NinjaAPI(
     csrf=False,
     title="Seaside Sustainability WebGIS API",
     description="API for managing adopted areas and teams in the Seaside Sustainability WebGIS application.",
+    renderer=TimedJSONRenderer(),
 )
 
-
-def require_auth(view_func):
-    @functools.wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        session_token = request.headers.get("X-Session-Token")
-        user = get_user_from_token(session_token)
-        if not user:
-            return JsonResponse({"success": False, "message": "Not authenticated"}, status=401)
-        request.user = user
-        return view_func(request, *args, **kwargs)
-
-    return wrapper
+# Read endpoints are async views on the async ORM, so under ASGI a request waiting on
+# PostGIS does not hold a thread. Writes stay synchronous. Raw-SQL helpers that only
+# have a sync form are run through sync_to_async. The plain map and team reads are
+# served from read replicas when DATABASE_REPLICAS lists any (see api.replicas).
 
 
 def require_team_leader(user, team):
@@ -42,68 +56,57 @@ def require_team_leader(user, team):
         return JsonResponse({"success": False, "message": "You are not a team leader"}, status=403)
 
 
-# -------------------- Helper: Resolve user from session token --------------------
-def get_user_from_token(token):
-    try:
-        print(f"Looking for session with key: {token}")
-        session = Session.objects.get(session_key=token)
-        print(f"Session found: {session}")
+def active_areas_in_bbox(bbox):
+    areas = AdoptedArea.objects.active()
+    if bbox:
+        # Bounding-box predicate on the geometry column, answered by the GiST index.
+        areas = areas.filter(location__within=parse_bbox(bbox))
+    return areas
+
 
-        session_data = session.get_decoded()
-        print(f"Session data: {session_data}")
+OVERLAP_LEADERS_ONLY = "Only team leaders can adopt a spot that overlaps another adoption."
 
-        user_id = session_data.get('_auth_user_id')
-        print(f"User ID from session: {user_id}")
 
-        if not user_id:
-            print("No user ID in session")
-            return None
+def check_spacing(request, data, allow_overlap, exclude_id=None):
+    """Error response if ``data`` is too close to another active adoption, else None.
 
-        user = User.objects.get(id=user_id)
-        print(f"User found: {user}")
-        return user
-    except Session.DoesNotExist:
-        print("Session does not exist")
+    Call inside the transaction that saves ``data``, so concurrent adoptions nearby wait for it.
+    """
+    if allow_overlap:
+        if not request.user.led_teams.exists():
+            return JsonResponse({"success": False, "message": OVERLAP_LEADERS_ONLY}, status=403)
         return None
-    except User.DoesNotExist:
-        print("User does not exist")
-        return None
-    except Exception as e:
-        print(f"Unexpected error: {str(e)}")
+    if not data.is_active:
         return None
 
+    lng, lat = data.location.coordinates
+    conflict_id = locked_spacing_conflict(lng, lat, exclude_id=exclude_id)
+    if conflict_id:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": f"Another active adoption is within {settings.ADOPTION_MIN_SPACING_M:g} m of this spot.",
+                "conflict_id": conflict_id,
+            },
+            status=409,
+        )
+    return None
+
 
 # -------------------- ADOPT AREA --------------------
 @api.post("/adopt-area/", tags=["Adopt Area"])
 @require_auth
-def adopt_area(request, data: AdoptAreaInput):
+def adopt_area(request, data: AdoptAreaInput, allow_overlap: bool = False):
     try:
-        if data.adoption_type == "temporary" and not data.end_date:
-            return JsonResponse(
-                {"success": False, "message": "end_date is required for temporary adoption."},
-                status=400,
-            )
-
-        lng, lat = data.location.coordinates
-        point = GEOSGeometry(f'POINT({lng} {lat})', srid=4326)
-
-        payload = {
-            "user": request.user,
-            "area_name": data.area_name.strip(),
-            "adoptee_name": data.adoptee_name.strip(),
-            "email": str(data.email),
-            "adoption_type": data.adoption_type,
-            "end_date": data.end_date,
-            "is_active": data.is_active,
-            "note": data.note.strip(),
-            "location": point,
-            "city": data.city.strip(),
-            "state": data.state.strip(),
-            "country": data.country.strip(),
-        }
+        error = adoption_error(data)
+        if error:
+            return JsonResponse({"success": False, "message": error}, status=400)
 
         with transaction.atomic():
-            obj = AdoptedArea.objects.create(**payload)
+            spacing_error = check_spacing(request, data, allow_overlap)
+            if spacing_error:
+                return spacing_error
+            obj = AdoptedArea.objects.create(user=request.user, **adoption_fields(data))
 
         return JsonResponse(
             {"success": True, "message": "Area adopted successfully!", "id": obj.id},
@@ -128,62 +131,195 @@ def adopt_area(request, data: AdoptAreaInput):
         )
 
 
+@api.post("/adopt-area/bulk/", tags=["Adopt Area"])
+@require_auth
+def adopt_areas_bulk(request, payload: AdoptAreaBulkInput, allow_overlap: bool = False):
+    if allow_overlap and not request.user.led_teams.exists():
+        return JsonResponse({"success": False, "message": OVERLAP_LEADERS_ONLY}, status=403)
+
+    results = bulk_adopt(request.user, payload.items, check_spacing=not allow_overlap)
+    created = sum(result["success"] for result in results)
+    return JsonResponse(
+        {"success": created > 0, "created": created, "failed": len(results) - created, "results": results},
+        status=201 if created else 400,
+    )
+
+
 @api.get("/adopted-area-layer/", response=List[AdoptAreaLayer], tags=["Adopt Area"])
-def list_adopted_areas(request):
+@read_replica
+@conditional_get(ADOPTED_AREAS)
+async def list_adopted_areas(
+    request,
+    bbox: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    next_cursor = None
+    # Read before the rows, so writes that land during the query are replayed by delta sync.
+    # Later pages leave it out: a client syncs from the token of its first page.
+    sync_token = None if cursor else sync.encode_token(await sync_to_async(sync.current_revision)())
     try:
-        return [
-            AdoptAreaLayer(
-                id=area.id,
-                area_name=area.area_name,
-                adoptee_name=area.adoptee_name,
-                email=area.email,
-                location={
-                    "type": "Point",
-                    "coordinates": [area.location.x, area.location.y]
-                },
-                city=area.city,
-                state=area.state,
-                country=area.country,
-                note=area.note
-            )
-            for area in AdoptedArea.objects.filter(is_active=True)
-        ]
+        rows = layer_values(active_areas_in_bbox(bbox))
+        size = page_size(limit, cursor)
+        if size:
+            rows, next_cursor = await apaginate(rows, cursor, size)
+        else:
+            rows = [row async for row in rows]
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+
+    # Rows come straight from the database, so skip per-row pydantic validation and
+    # encode them directly; response= still documents the shape in the OpenAPI schema.
+    try:
+        response = HttpResponse(dumps([layer_item(row) for row in rows]), content_type="application/json")
     except Exception as e:
         return JsonResponse(
             {"success": False, "message": f"Error fetching adopted areas: {str(e)}"},
             status=500
         )
+    set_next_page_headers(request, response, next_cursor)
+    if sync_token:
+        response["X-Sync-Token"] = sync_token
+    return response
+
+
+@api.get("/adopted-area-layer/changes/", response=AdoptedAreaChanges, tags=["Adopt Area"])
+@conditional_get(ADOPTED_AREAS)
+async def list_adopted_area_changes(request, since: str):
+    try:
+        since = sync.decode_token(since)
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+
+    changes = await sync_to_async(sync.changes_since)(since)
+    return HttpResponse(dumps(changes), content_type="application/json")
+
+
+@api.get("/adopted-area-layer/geojson/", tags=["Adopt Area"])
+@conditional_get(ADOPTED_AREAS)
+async def stream_adopted_areas(request, bbox: Optional[str] = None):
+    try:
+        areas = active_areas_in_bbox(bbox)
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+
+    sync_token = sync.encode_token(await sync_to_async(sync.current_revision)())
+    # Server-side cursor: rows are fetched and encoded a chunk at a time, never all at once.
+    # ASGI buffers a sync body and WSGI an async one, so each server gets its own kind.
+    rows = layer_rows(areas)
+    if isinstance(request, ASGIRequest):
+        body = astream_feature_collection(rows.aiterator(chunk_size=STREAM_CHUNK_SIZE))
+    else:
+        body = stream_feature_collection(rows.iterator(chunk_size=STREAM_CHUNK_SIZE))
+    response = StreamingHttpResponse(body, content_type="application/geo+json")
+    response["X-Sync-Token"] = sync_token
+    return response
+
+
+@api.get("/adopted-area-layer/stream/", tags=["Adopt Area"])
+async def subscribe_adopted_areas(request, bbox: Optional[str] = None):
+    # An open stream under WSGI would pin a worker thread for as long as the client stays.
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"success": False, "message": "Live updates need the ASGI server."}, status=501)
+    try:
+        extent = parse_bbox(bbox).extent if bbox else None
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+
+    try:
+        subscription = await events.hub.subscribe(extent)
+    except Exception:
+        return JsonResponse({"success": False, "message": "Live updates are unavailable."}, status=503)
+    # Subscribe first: anything committed after this token arrives as an event.
+    sync_token = sync.encode_token(await sync_to_async(sync.current_revision)())
+    response = StreamingHttpResponse(
+        events.stream(subscription, settings.ADOPTION_EVENTS["HEARTBEAT_S"]), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    response["X-Sync-Token"] = sync_token
+    return response
+
+
+@api.get("/adopted-area-clusters/", response=List[AdoptedAreaCluster], tags=["Adopt Area"])
+@conditional_get(ADOPTED_AREAS)
+async def list_adopted_area_clusters(
+    request,
+    response: HttpResponse,
+    z: int = Query(..., ge=0, le=22),
+    bbox: Optional[str] = None,
+):
+    try:
+        areas = active_areas_in_bbox(bbox)
+        extent = parse_bbox(bbox).extent if bbox else WORLD_EXTENT
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+    # Bound the response by the grid, not by the data: past a few zooms the whole world
+    # holds more cells than any map can show.
+    if cluster_cell_count(z, extent) > MAX_CLUSTER_CELLS:
+        message = f"bbox is too large for zoom {z}." if bbox else f"bbox is required at zoom {z}."
+        return JsonResponse({"success": False, "message": message}, status=400)
+
+    # Snap every point to the zoom's grid and aggregate per cell in PostGIS, so the
+    # response holds one row per visible cell however many adoptions fall inside it.
+    cells = (
+        areas.annotate(cell=SnapToGrid("location", cluster_cell_size(z)))
+        .values("cell")
+        .annotate(
+            count=Count("id"),
+            centroid=Centroid(Collect("location")),
+            sample_ids=ArraySample("id", size=CLUSTER_SAMPLE_SIZE),
+        )
+        .order_by()
+    )
+    return [
+        AdoptedAreaCluster(
+            centroid={"type": "Point", "coordinates": [cell["centroid"].x, cell["centroid"].y]},
+            count=cell["count"],
+            sample_ids=cell["sample_ids"],
+        )
+        async for cell in cells
+    ]
+
+
+@api.get("/adopted-areas/nearby/", response=List[NearbyAdoptedArea], tags=["Adopt Area"])
+@conditional_get(ADOPTED_AREAS)
+async def list_nearby_adopted_areas(
+    request,
+    response: HttpResponse,
+    lng: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+    radius_m: float = Query(5000, gt=0, le=MAX_NEARBY_RADIUS_M),
+    limit: int = Query(20, ge=1, le=MAX_NEARBY_LIMIT),
+):
+    return [
+        NearbyAdoptedArea(
+            location={"type": "Point", "coordinates": [row.pop("lng"), row.pop("lat")]},
+            **row,
+        )
+        for row in await sync_to_async(nearby_areas)(lng, lat, radius_m, limit)
+    ]
 
 
 @api.put("/adopt-area/{area_id}/", tags=["Adopt Area"])
 @require_auth
-def update_adopted_area(request, area_id: int, data: AdoptAreaInput):
+def update_adopted_area(request, area_id: int, data: AdoptAreaInput, allow_overlap: bool = False):
     try:
         area = AdoptedArea.objects.get(id=area_id, user=request.user)
     except AdoptedArea.DoesNotExist:
         return JsonResponse({"success": False, "message": "Adopted area not found"}, status=404)
 
-    if data.adoption_type == "temporary" and not data.end_date:
-        return JsonResponse(
-            {"success": False, "message": "end_date is required for temporary adoption."},
-            status=400,
-        )
+    error = adoption_error(data)
+    if error:
+        return JsonResponse({"success": False, "message": error}, status=400)
 
-    lng, lat = data.location.coordinates
-    location_point = GEOSGeometry(f'POINT({lng} {lat})', srid=4326)
-
-    area.area_name = data.area_name.strip()
-    area.adoptee_name = data.adoptee_name.strip()
-    area.email = str(data.email)
-    area.adoption_type = data.adoption_type
-    area.end_date = data.end_date
-    area.is_active = data.is_active
-    area.note = data.note.strip()
-    area.location = location_point
-    area.city = data.city.strip()
-    area.state = data.state.strip()
-    area.country = data.country.strip()
-    area.save()
+    with transaction.atomic():
+        spacing_error = check_spacing(request, data, allow_overlap, exclude_id=area.id)
+        if spacing_error:
+            return spacing_error
+        for field, value in adoption_fields(data).items():
+            setattr(area, field, value)
+        area.save()
 
     return JsonResponse({"success": True, "message": "Adopted area updated successfully!"})
 
@@ -198,41 +334,161 @@ def delete_adopted_area(request, area_id: int):
     except AdoptedArea.DoesNotExist:
         return JsonResponse({"success": False, "message": "Adopted area not found"}, status=404)
 
-    # -------------------- TEAMS --------------------
 
+# -------------------- STATISTICS --------------------
+@api.get("/stats/adoptions/", response=AdoptionStatsOut, tags=["Statistics"])
+@read_replica
+@conditional_get(ADOPTED_AREAS)
+async def adoption_stats(
+    request,
+    response: HttpResponse,
+    group_by: Literal["country", "state", "city"] = "country",
+    adoption_type: Optional[Literal["indefinite", "temporary"]] = None,
+):
+    totals, groups = await sync_to_async(stats.grouped_stats)(group_by, adoption_type)
+    return {"totals": totals, "groups": groups}
+
+
+# -------------------- SEARCH --------------------
+MAX_SEARCH_LIMIT = 100
+
+
+def area_search_out(row):
+    row["location"] = {"type": "Point", "coordinates": [row.pop("lng"), row.pop("lat")]}
+    return row
+
+
+@api.get("/search/", response=SearchResults, tags=["Search"])
+@read_replica
+@conditional_get(ADOPTED_AREAS, TEAMS)
+async def search_all(
+    request,
+    response: HttpResponse,
+    q: str = Query(..., min_length=2, max_length=100),
+    bbox: Optional[str] = None,
+    kind: Optional[Literal["areas", "teams"]] = Query(None, alias="type"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+):
+    areas, teams = [], []
+    try:
+        if kind != "teams":
+            rows = search.area_results(AdoptedArea.objects.active(), q, bbox)[:limit]
+            areas = [area_search_out(row) async for row in rows]
+        if kind != "areas":
+            rows = search.team_results(Team.objects.all(), q, bbox)[:limit]
+            teams = [team_out(row) async for row in rows]
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+    return {"areas": areas, "teams": teams}
 
-@api.get("/teams/", response=List[TeamOut], tags=["Teams"])
-def list_teams(request):
-    return [
-        TeamOut(
-            id=team.id,
-            name=team.name,
-            description=team.description,
-            headquarters=Point(**json.loads(team.headquarters.geojson)),
-            city=team.city,
-            state=team.state,
-            country=team.country,
-            member_ids=list(team.members.values_list("id", flat=True)),
-            leader_ids=list(team.leaders.values_list("id", flat=True)),
-        )
-        for team in Team.objects.all()
-    ]
 
+# -------------------- LAYER SNAPSHOTS --------------------
+@api.get("/layers/manifest/", tags=["Layers"])
+def layer_manifest(request):
+    manifest = snapshots.read_manifest()
+    if manifest is None:
+        return JsonResponse({"success": False, "message": "No layer snapshot has been built yet."}, status=404)
+    # Revalidate the manifest every time; the files it points to are cached forever.
+    response = JsonResponse(manifest)
+    response["Cache-Control"] = "no-cache"
+    return response
 
-@api.get("/teams/{team_id}/", response=TeamOut, tags=["Teams"])
-def get_team(request, team_id: int):
-    team = get_object_or_404(Team, id=team_id)
-    return TeamOut(
-        id=team.id,
-        name=team.name,
-        description=team.description,
-        headquarters=Point(**json.loads(team.headquarters.geojson)),
-        city=team.city,
-        state=team.state,
-        country=team.country,
+
+# -------------------- METRICS --------------------
+@api.get("/metrics", include_in_schema=False)
+def metrics_exposition(request):
+    token = settings.METRICS["TOKEN"]
+    # Route names and traffic are not public, so there is no scraping without a token.
+    if not token:
+        return JsonResponse({"success": False, "message": "Set METRICS_TOKEN to scrape metrics."}, status=403)
+    if not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return JsonResponse({"success": False, "message": "Not authenticated"}, status=401)
+    return HttpResponse(metrics.render(metrics.collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# -------------------- VECTOR TILES --------------------
+@api.get("/tiles/{int:z}/{int:x}/{int:y}.mvt", tags=["Tiles"])
+@conditional_get(ADOPTED_AREAS, TEAMS)
+async def get_tile(request, z: int, x: int, y: int):
+    if not tiles.is_valid_tile(z, x, y):
+        return JsonResponse({"success": False, "message": "Tile coordinates out of range."}, status=400)
+
+    tile = await sync_to_async(tiles.get_tile)(z, x, y)
+    response = HttpResponse(tile, content_type="application/vnd.mapbox-vector-tile")
+    response["Cache-Control"] = f"public, max-age={settings.TILE_HTTP_MAX_AGE}"
+    return response
+
+
+# -------------------- TEAMS --------------------
+
+
+def _related_ids(m2m_field):
+    through = m2m_field.remote_field.through.objects.filter(**{m2m_field.m2m_field_name(): OuterRef("pk")})
+    user_column = m2m_field.m2m_reverse_field_name()
+    return ArraySubquery(through.order_by(user_column).values(user_column))
+
+
+def _related_count(m2m_field):
+    team_column = m2m_field.m2m_field_name()
+    through = m2m_field.remote_field.through.objects.filter(**{team_column: OuterRef("pk")})
+    return Coalesce(Subquery(through.order_by().values(team_column).annotate(n=Count("pk")).values("n")), 0)
+
+
+def team_rows(teams, counts=False):
+    """``.values()`` rows for teams in one query: M2M ids (or counts) are aggregated in SQL subqueries."""
+    if counts:
+        related = {
+            "member_count": _related_count(Team.members.field),
+            "leader_count": _related_count(Team.leaders.field),
+        }
+    else:
+        related = {
+            "member_ids": _related_ids(Team.members.field),
+            "leader_ids": _related_ids(Team.leaders.field),
+        }
+    return teams.annotate(lng=Longitude("headquarters"), lat=Latitude("headquarters"), **related).values(
+        "id", "name", "description", "city", "state", "country", "created_at", "lng", "lat", *related
     )
 
 
+def team_out(row):
+    row["headquarters"] = {"type": "Point", "coordinates": [row.pop("lng"), row.pop("lat")]}
+    return row
+
+
+@api.get("/teams/", response=List[Union[TeamOut, TeamCountsOut]], tags=["Teams"])
+@read_replica
+@conditional_get(TEAMS)
+async def list_teams(
+    request,
+    response: HttpResponse,
+    include: Optional[Literal["counts"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    rows = team_rows(Team.objects.all(), counts=include == "counts")
+    size = page_size(limit, cursor)
+    if size:
+        try:
+            rows, next_cursor = await apaginate(rows, cursor, size)
+        except ValueError as ve:
+            return JsonResponse({"success": False, "message": str(ve)}, status=400)
+        set_next_page_headers(request, response, next_cursor)
+    else:
+        rows = [row async for row in rows.order_by("id")]
+    return [team_out(row) for row in rows]
+
+
+@api.get("/teams/{team_id}/", response=TeamOut, tags=["Teams"])
+@read_replica
+@conditional_get(TEAMS)
+async def get_team(request, response: HttpResponse, team_id: int):
+    team = await team_rows(Team.objects.filter(id=team_id)).afirst()
+    if team is None:
+        raise Http404("No Team matches the given query.")
+    return team_out(team)
+
+
 @api.put("/teams/{team_id}/", response=TeamOut, tags=["Teams"])
 @require_auth
 def update_team(request, team_id: int, payload: TeamCreate):
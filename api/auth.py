@@ -0,0 +1,309 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.timezone import now
+
+from . import metrics, replicas
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class LocalTokenCache:
+    """In-process LRU of session token -> user, with a TTL capped by the session's own expiry.
+
+    Invalidation only reaches this process, so on its own it is meant for single-process
+    servers; TieredTokenCache puts it in front of the shared cache.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                self._discard(token)
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    async def aget(self, token):
+        return self.get(token)
+
+    def set(self, token, user, session_expires_at):
+        expires_at = min(time.time() + self.ttl, session_expires_at)
+        with self._lock:
+            self._discard(token)
+            self._entries[token] = (user, expires_at)
+            self._tokens_by_user.setdefault(user.pk, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    async def aset(self, token, user, session_expires_at):
+        self.set(token, user, session_expires_at)
+
+    def invalidate_token(self, token):
+        with self._lock:
+            self._discard(token)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _discard(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[0].pk)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[0].pk]
+
+
+class DjangoTokenCache:
+    """Token cache shared between processes through the Django cache framework.
+
+    Tokens map to a user id and users are cached under their own key, so deactivating
+    a user only needs one delete no matter how many sessions they hold.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+
+    def entry(self, token):
+        """``(user, session expiry timestamp)`` for ``token``, or None."""
+        entry = cache.get(self._token_key(token))
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            cache.delete(self._token_key(token))
+            return None
+        user = cache.get(self._user_key(user_id))
+        if user is None:
+            user = User.objects.filter(pk=user_id, is_active=True).first()
+            if user is None:
+                self.invalidate_token(token)
+                return None
+            cache.set(self._user_key(user_id), user, self.ttl)
+        return user, expires_at
+
+    def get(self, token):
+        entry = self.entry(token)
+        return entry and entry[0]
+
+    async def aget(self, token):
+        # May fall back to the database, so keep it off the event loop.
+        return await sync_to_async(self.get)(token)
+
+    def set(self, token, user, session_expires_at):
+        timeout = max(1, min(self.ttl, int(session_expires_at - time.time())))
+        cache.set(self._token_key(token), (user.pk, session_expires_at), timeout)
+        cache.set(self._user_key(user.pk), user, self.ttl)
+
+    async def aset(self, token, user, session_expires_at):
+        await sync_to_async(self.set)(token, user, session_expires_at)
+
+    def invalidate_token(self, token):
+        cache.delete(self._token_key(token))
+
+    def invalidate_user(self, user_id):
+        cache.delete(self._user_key(user_id))
+
+    @staticmethod
+    def _token_key(token):
+        return f"auth:token:{token}"
+
+    @staticmethod
+    def _user_key(user_id):
+        return f"auth:user:{user_id}"
+
+
+class TieredTokenCache:
+    """A LocalTokenCache in front of a DjangoTokenCache.
+
+    Hits in process memory cost no query. Writes and invalidations go to both tiers, so
+    other processes see a logout or deactivation through the shared tier as soon as
+    their own local entry, which lives at most LOCAL_TTL seconds, runs out.
+    """
+
+    def __init__(self, local, shared):
+        self.local = local
+        self.shared = shared
+
+    def get(self, token):
+        user = self.local.get(token)
+        if user is None:
+            user = self._remember(token, self.shared.entry(token))
+        return user
+
+    async def aget(self, token):
+        user = self.local.get(token)
+        if user is None:
+            user = self._remember(token, await sync_to_async(self.shared.entry)(token))
+        return user
+
+    def _remember(self, token, entry):
+        if entry is None:
+            return None
+        user, session_expires_at = entry
+        self.local.set(token, user, session_expires_at)
+        return user
+
+    def set(self, token, user, session_expires_at):
+        self.shared.set(token, user, session_expires_at)
+        self.local.set(token, user, session_expires_at)
+
+    async def aset(self, token, user, session_expires_at):
+        await self.shared.aset(token, user, session_expires_at)
+        self.local.set(token, user, session_expires_at)
+
+    def invalidate_token(self, token):
+        self.shared.invalidate_token(token)
+        self.local.invalidate_token(token)
+
+    def invalidate_user(self, user_id):
+        self.shared.invalidate_user(user_id)
+        self.local.invalidate_user(user_id)
+
+    def clear(self):
+        """Forget this process's entries; the shared tier expires on its own."""
+        self.local.clear()
+
+
+def _build_token_cache():
+    options = settings.SESSION_TOKEN_CACHE
+    local = LocalTokenCache(max_entries=options["MAX_ENTRIES"], ttl=options["LOCAL_TTL"])
+    if options["BACKEND"] == "django":
+        return TieredTokenCache(local, DjangoTokenCache(ttl=options["TTL"]))
+    return local
+
+
+token_cache = _build_token_cache()
+
+
+def require_auth(view_func):
+    """Resolve X-Session-Token into ``request.user``; works on sync and async views."""
+    if inspect.iscoroutinefunction(view_func):
+        @functools.wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            session_token = request.headers.get("X-Session-Token")
+            user = await aget_user_from_token(session_token)
+            if not user:
+                return JsonResponse({"success": False, "message": "Not authenticated"}, status=401)
+            request.user = user
+            if request.method not in SAFE_METHODS:
+                await replicas.apin(session_token)
+            return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        session_token = request.headers.get("X-Session-Token")
+        user = get_user_from_token(session_token)
+        if not user:
+            return JsonResponse({"success": False, "message": "Not authenticated"}, status=401)
+        request.user = user
+        if request.method not in SAFE_METHODS:
+            # Pin before writing, so no read after the write can reach a lagging replica.
+            replicas.pin(session_token)
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+# -------------------- Helper: Resolve user from session token --------------------
+def get_user_from_token(token):
+    if not token:
+        return None
+
+    user = token_cache.get(token)
+    if user is not None:
+        metrics.increment("auth_token_cache_hits_total")
+        return user
+    metrics.increment("auth_token_cache_misses_total")
+
+    try:
+        session = Session.objects.get(session_key=token, expire_date__gt=now())
+        user_id = session.get_decoded().get('_auth_user_id')
+        if not user_id:
+            logger.debug("Session has no authenticated user")
+            return None
+
+        user = User.objects.get(id=user_id)
+    except Session.DoesNotExist:
+        logger.debug("Session does not exist or has expired")
+        return None
+    except User.DoesNotExist:
+        logger.debug("User %s from session does not exist", user_id)
+        return None
+    except Exception:
+        logger.exception("Unexpected error resolving session token")
+        return None
+
+    if not user.is_active:
+        logger.debug("User %s is inactive", user.pk)
+        return None
+
+    token_cache.set(token, user, session.expire_date.timestamp())
+    return user
+
+
+async def aget_user_from_token(token):
+    """Async twin of get_user_from_token, using the async ORM."""
+    if not token:
+        return None
+
+    user = await token_cache.aget(token)
+    if user is not None:
+        metrics.increment("auth_token_cache_hits_total")
+        return user
+    metrics.increment("auth_token_cache_misses_total")
+
+    session = await Session.objects.filter(session_key=token, expire_date__gt=now()).afirst()
+    if session is None:
+        logger.debug("Session does not exist or has expired")
+        return None
+    user_id = session.get_decoded().get('_auth_user_id')
+    if not user_id:
+        logger.debug("Session has no authenticated user")
+        return None
+
+    user = await User.objects.filter(id=user_id).afirst()
+    if user is None:
+        logger.debug("User %s from session does not exist", user_id)
+        return None
+    if not user.is_active:
+        logger.debug("User %s is inactive", user.pk)
+        return None
+
+    await token_cache.aset(token, user, session.expire_date.timestamp())
+    return user
@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+
+from .models import AdoptedArea
+
+User = get_user_model()
+
+
+@contextmanager
+def rolled_back():
+    """Run a benchmark inside a transaction that is always rolled back."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def benchmark_user():
+    user, _ = User.objects.get_or_create(
+        email="benchmark@example.com",
+        defaults={"username": "benchmark"},
+    )
+    return user
+
+
+def seed_adopted_areas(count, extent, user, seed=0, batch_size=5000):
+    """Bulk insert ``count`` active adoptions spread uniformly over ``extent``."""
+    rng = random.Random(seed)
+    min_lng, min_lat, max_lng, max_lat = extent
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        AdoptedArea.objects.bulk_create(
+            [
+                AdoptedArea(
+                    user=user,
+                    area_name=f"Benchmark spot {created + i}",
+                    adoptee_name="Benchmark",
+                    email=user.email,
+                    location=Point(rng.uniform(min_lng, max_lng), rng.uniform(min_lat, max_lat), srid=4326),
+                    city="Bench",
+                    state="Bench",
+                    country="Bench",
+                )
+                for i in range(size)
+            ],
+            batch_size=batch_size,
+        )
+        created += size
+    return created
+
+
+def analyze(model):
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+def measure(func, repeat=20, warmup=3):
+    """Call ``func`` repeatedly and return latency percentiles in milliseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentiles(samples)
+
+
+def percentiles(samples):
+    """Summary of latency samples in milliseconds."""
+    samples = sorted(samples)
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max": samples[-1],
+    }
@@ -0,0 +1,344 @@
+"""Live adoption events for the ``/adopted-area-layer/stream/`` Server-Sent Events endpoint.
+
+Model signals turn committed writes into small event dicts and hand them to the configured
+backend. Each ASGI worker runs one EventHub that receives events from the backend and
+fans them out to its subscribers. Subscribers are plain asyncio queues, so an idle client
+costs a queue and a suspended coroutine, not a thread.
+
+Backends (ADOPTION_EVENTS["BACKEND"]):
+
+* ``"memory"``: events only reach subscribers in the same process. Use it for tests and
+  single-process servers.
+* ``"postgres"``: events are sent with pg_notify and every worker LISTENs on one dedicated
+  connection, so a write in any process (web, Celery, management command) reaches all
+  workers.
+
+Queues are bounded. A client that falls ADOPTION_EVENTS["QUEUE_SIZE"] events behind is
+sent a final ``reset`` event and disconnected; it should resync with
+/adopted-area-layer/changes/ and subscribe again.
+"""
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.db import connection, connections
+
+from .geojson import LAYER_PROPERTIES, layer_item
+
+logger = logging.getLogger(__name__)
+
+# Writes that touch more adoptions than this send a single "sync" event instead.
+MAX_EVENTS_PER_WRITE = 100
+# pg_notify rejects payloads of 8000 bytes or more.
+MAX_NOTIFY_PAYLOAD = 7900
+NOTIFY_CHANNEL = "adopted_area_events"
+# How long browsers wait before reconnecting a dropped stream.
+RETRY_MS = 5000
+
+# Queued for a subscriber whose queue overflowed; the stream ends after it.
+RESET = {"type": "reset"}
+
+
+# -------------------- Events --------------------
+def area_event(kind, area, previous_location=None):
+    """An event for one adoption. ``kind`` is "created", "updated" or "removed".
+
+    ``previous_location`` is the stored point before this write; when it moved, the
+    event carries it as prev_lng/prev_lat so viewers of the old spot can drop it.
+    """
+    event = {
+        "type": kind,
+        "id": area.pk,
+        "revision": area.revision or None,
+        "lng": area.location.x,
+        "lat": area.location.y,
+    }
+    if previous_location is not None and previous_location != area.location:
+        event["prev_lng"], event["prev_lat"] = previous_location.x, previous_location.y
+    if kind != "removed":
+        row = {name: getattr(area, name) for name in LAYER_PROPERTIES}
+        event["area"] = layer_item({**row, "id": area.pk, "lng": area.location.x, "lat": area.location.y})
+    return event
+
+
+def sync_event():
+    """Tells clients to fetch /adopted-area-layer/changes/ rather than carrying the rows."""
+    return {"type": "sync"}
+
+
+def area_events(kind, areas):
+    # COPY imports do not read back the ids, so their rows cannot be sent one by one.
+    if len(areas) > MAX_EVENTS_PER_WRITE or any(area.pk is None for area in areas):
+        return [sync_event()]
+    return [area_event(kind, area) for area in areas]
+
+
+def encode_sse(event):
+    """Format ``event`` as one Server-Sent Events message."""
+    lines = []
+    if event.get("revision"):
+        lines.append(f"id: {event['revision']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+# -------------------- Hub --------------------
+class Subscription:
+    def __init__(self, bbox, max_queue):
+        # (min_lng, min_lat, max_lng, max_lat) or None for the whole layer.
+        self.bbox = bbox
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def contains(self, lng, lat):
+        min_lng, min_lat, max_lng, max_lat = self.bbox
+        return min_lng <= lng <= max_lng and min_lat <= lat <= max_lat
+
+    def event_for(self, event):
+        """``event`` as this subscriber should see it, or None if it happened out of view."""
+        if self.bbox is None or event.get("lng") is None or self.contains(event["lng"], event["lat"]):
+            return event
+        if event.get("prev_lng") is not None and self.contains(event["prev_lng"], event["prev_lat"]):
+            # Moved out of the bbox: to this client it is gone.
+            return {**{key: event[key] for key in ("id", "revision", "lng", "lat")}, "type": "removed"}
+        return None
+
+    def offer(self, event):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what is queued and tell the client to resync.
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESET)
+
+
+class EventHub:
+    """Per-process fan-out from the backend to subscriber queues.
+
+    Everything except ``publish`` runs on the ASGI event loop. The backend listener is
+    started by the ASGI lifespan (see WebGIS/asgi.py) or by the first subscriber.
+    """
+
+    def __init__(self, backend, queue_size):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.loop = None
+        self._starting = None
+
+    async def start(self):
+        if self._starting is None:
+            self.loop = asyncio.get_running_loop()
+            self._starting = asyncio.ensure_future(self.backend.start(self))
+        try:
+            await self._starting
+        except Exception:
+            # Let the next subscriber try again.
+            self._starting = None
+            raise
+
+    async def stop(self):
+        for subscription in list(self.subscribers):
+            subscription.close()
+        if self._starting is not None:
+            self._starting = None
+            await self.backend.stop()
+        self.loop = None
+
+    async def subscribe(self, bbox=None):
+        await self.start()
+        subscription = Subscription(bbox, self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    def dispatch(self, event):
+        for subscription in list(self.subscribers):
+            visible = subscription.event_for(event)
+            if visible is not None:
+                subscription.offer(visible)
+
+    def dispatch_threadsafe(self, events):
+        """Hand ``events`` to the loop from any thread; dropped while the hub is not running."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        for event in events:
+            loop.call_soon_threadsafe(self.dispatch, event)
+
+    def reset_all(self):
+        """Events may have been missed (e.g. the listener reconnected); make every client resync."""
+        for subscription in list(self.subscribers):
+            subscription.close()
+
+    def publish(self, events):
+        """Send ``events`` to every worker. Call after the transaction commits."""
+        if not events:
+            return
+        try:
+            self.backend.publish(events)
+        except Exception:
+            # The write is committed either way; clients here must not silently miss it.
+            logger.exception("Could not publish %d adoption events; resetting subscribers.", len(events))
+            loop = self.loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self.reset_all)
+
+
+# -------------------- Backends --------------------
+class MemoryBackend:
+    """Delivers events to the hub of this process only."""
+
+    def __init__(self):
+        self.hub = None
+
+    async def start(self, hub):
+        self.hub = hub
+
+    async def stop(self):
+        self.hub = None
+
+    def publish(self, events):
+        if self.hub is not None:
+            self.hub.dispatch_threadsafe(events)
+
+
+class PostgresBackend:
+    """pg_notify on write, and one LISTEN connection per worker read from the event loop."""
+
+    RECONNECT_DELAY_S = 5
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+        self.hub = None
+        self.listener = None
+        self._reconnect = None
+
+    def publish(self, events):
+        with connection.cursor() as cursor:
+            for event in events:
+                payload = json.dumps(event, separators=(",", ":"))
+                if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+                    payload = json.dumps(sync_event())
+                cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, payload])
+
+    async def start(self, hub):
+        self.hub = hub
+        await self._listen()
+
+    async def stop(self):
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        self._close_listener()
+        self.hub = None
+
+    async def _listen(self):
+        loop = asyncio.get_running_loop()
+        self.listener = await loop.run_in_executor(None, self._connect)
+        loop.add_reader(self.listener.fileno(), self._on_readable)
+        logger.info("Listening for adoption events on %s.", NOTIFY_CHANNEL)
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        params = connections[self.alias].get_connection_params()
+        listener = psycopg2.connect(**params)
+        listener.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with listener.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return listener
+
+    def _on_readable(self):
+        try:
+            self.listener.poll()
+        except Exception:
+            logger.exception("Lost the adoption event listener; reconnecting.")
+            self._close_listener()
+            self.hub.reset_all()
+            self._reconnect = asyncio.ensure_future(self._reconnect_later())
+            return
+        while self.listener.notifies:
+            notify = self.listener.notifies.pop(0)
+            try:
+                self.hub.dispatch(json.loads(notify.payload))
+            except ValueError:
+                logger.warning("Ignoring malformed adoption event: %r", notify.payload)
+
+    async def _reconnect_later(self):
+        while self.hub is not None:
+            await asyncio.sleep(self.RECONNECT_DELAY_S)
+            try:
+                await self._listen()
+                return
+            except Exception:
+                logger.exception("Could not reconnect the adoption event listener.")
+
+    def _close_listener(self):
+        if self.listener is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self.listener.fileno())
+        except (RuntimeError, ValueError):
+            pass
+        self.listener.close()
+        self.listener = None
+
+
+def _build_hub():
+    options = settings.ADOPTION_EVENTS
+    backend = PostgresBackend() if options["BACKEND"] == "postgres" else MemoryBackend()
+    return EventHub(backend, queue_size=options["QUEUE_SIZE"])
+
+
+hub = _build_hub()
+
+
+# -------------------- Streaming --------------------
+async def stream(subscription, heartbeat):
+    """Yield SSE messages for ``subscription`` until it is reset or the client goes away."""
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection.
+                yield ": keep-alive\n\n"
+                continue
+            yield encode_sse(event)
+            if event is RESET:
+                return
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan handler that starts and stops the hub with the worker."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await hub.start()
+            except Exception:
+                # The rest of the API works without live events; subscribers retry the start.
+                logger.exception("Could not start the adoption event hub.")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await hub.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
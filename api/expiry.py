@@ -0,0 +1,64 @@
+"""Switching off temporary adoptions once their end date has passed.
+
+Rows are processed in short transactions of ``ADOPTION_EXPIRY_CHUNK_SIZE`` so no chunk
+holds row locks for long, and rows locked by a concurrent edit are left for the next run.
+Reads do not depend on this having run: AdoptedAreaQuerySet.active() already hides
+expired rows. This keeps is_active, the statistics rollup and the tile cache in step.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import localdate, now
+
+from .models import AdoptedArea
+from .signals import adopted_areas_bulk_changed
+from .stats import STAT_FIELDS
+from .sync import record_tombstones
+from .versions import ADOPTED_AREAS, bump
+
+logger = logging.getLogger(__name__)
+
+
+def expire_chunk(today, chunk_size):
+    """Deactivate up to ``chunk_size`` expired adoptions; returns how many were changed."""
+    with transaction.atomic():
+        areas = list(
+            AdoptedArea.objects.expired(today)
+            .order_by("end_date", "id")
+            .select_for_update(skip_locked=True)
+            .only("id", "location", *STAT_FIELDS)[:chunk_size]
+        )
+        if areas:
+            ids = [area.id for area in areas]
+            revision, updated_at = bump(ADOPTED_AREAS), now()
+            AdoptedArea.objects.filter(id__in=ids).update(is_active=False, revision=revision, updated_at=updated_at)
+            record_tombstones(ids, revision, "expired")
+            for area in areas:
+                area.revision = revision
+            # .update() skips model signals, so announce the change ourselves.
+            adopted_areas_bulk_changed.send(sender=AdoptedArea, areas=areas, action="deactivate", updated_at=updated_at)
+    return len(areas)
+
+
+def expire_adoptions(today=None, chunk_size=None):
+    """Deactivate every expired adoption, chunk by chunk.
+
+    Returns one ``{"rows": n, "ms": elapsed}`` dict per non-empty chunk.
+    """
+    today = today or localdate()
+    chunk_size = chunk_size or settings.ADOPTION_EXPIRY_CHUNK_SIZE
+    chunks = []
+    while True:
+        started = time.perf_counter()
+        rows = expire_chunk(today, chunk_size)
+        if not rows:
+            break
+        elapsed = (time.perf_counter() - started) * 1000
+        chunks.append({"rows": rows, "ms": elapsed})
+        logger.info("Expired %d adoptions in %.1f ms.", rows, elapsed)
+        if rows < chunk_size:
+            break
+    logger.info("Expiry run finished: %d adoptions in %d chunks.", sum(c["rows"] for c in chunks), len(chunks))
+    return chunks
@@ -0,0 +1,63 @@
+from django.contrib.gis.geos import Polygon
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from django.db.models import Aggregate, Func
+
+
+def parse_bbox(value):
+    """Parse a ``minLng,minLat,maxLng,maxLat`` string into a WGS84 polygon."""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        raise ValueError("bbox must be 'minLng,minLat,maxLng,maxLat'.")
+
+    if not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180 and -90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise ValueError("bbox coordinates out of range.")
+    if min_lng >= max_lng or min_lat >= max_lat:
+        raise ValueError("bbox min values must be smaller than max values.")
+
+    bbox = Polygon.from_bbox((min_lng, min_lat, max_lng, max_lat))
+    bbox.srid = 4326
+    return bbox
+
+
+class Longitude(Func):
+    """``ST_X`` of a point column, read in SQL instead of parsing the geometry in Python."""
+
+    function = "ST_X"
+    output_field = models.FloatField()
+
+
+class Latitude(Func):
+    function = "ST_Y"
+    output_field = models.FloatField()
+
+
+# Clusters are laid out on a grid of CLUSTER_CELL_PX square cells over 256px web map tiles.
+CLUSTER_CELL_PX = 64
+
+
+WORLD_EXTENT = (-180, -90, 180, 90)
+
+
+def cluster_cell_size(zoom):
+    """Grid cell size in degrees for clustering at the given zoom level."""
+    return 360 / (2 ** zoom) * CLUSTER_CELL_PX / 256
+
+
+def cluster_cell_count(zoom, extent=WORLD_EXTENT):
+    """Most clusters ``extent`` can produce at ``zoom``: the grid cells it touches."""
+    size = cluster_cell_size(zoom)
+    min_lng, min_lat, max_lng, max_lat = extent
+    # SnapToGrid rounds to the nearest multiple of the cell size.
+    columns = round(max_lng / size) - round(min_lng / size) + 1
+    rows = round(max_lat / size) - round(min_lat / size) + 1
+    return columns * rows
+
+
+class ArraySample(Aggregate):
+    """``ARRAY_AGG`` trimmed to the ``size`` smallest values of each group."""
+
+    function = "ARRAY_AGG"
+    template = "(%(function)s(%(expressions)s ORDER BY %(expressions)s))[1:%(size)d]"
+    output_field = ArrayField(models.BigIntegerField())
@@ -0,0 +1,101 @@
+import json
+
+from .geo import Latitude, Longitude
+from .timing import serialization
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Properties of an adopted area feature, matching the AdoptAreaLayer schema.
+LAYER_PROPERTIES = ("area_name", "adoptee_name", "email", "city", "state", "country", "note")
+LAYER_COLUMNS = ("id", "lng", "lat") + LAYER_PROPERTIES
+# Properties of a team headquarters feature.
+TEAM_PROPERTIES = ("name", "city", "state", "country")
+TEAM_COLUMNS = ("id", "lng", "lat") + TEAM_PROPERTIES
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def layer_rows(areas):
+    """Flat ``LAYER_COLUMNS`` tuples for a queryset of adopted areas."""
+    return areas.annotate(lng=Longitude("location"), lat=Latitude("location")).values_list(*LAYER_COLUMNS)
+
+
+def team_feature_rows(teams):
+    """Flat ``TEAM_COLUMNS`` tuples for a queryset of teams, as GeoJSON features need them."""
+    return teams.annotate(lng=Longitude("headquarters"), lat=Latitude("headquarters")).values_list(*TEAM_COLUMNS)
+
+
+def layer_values(areas):
+    """``.values()`` rows for the layer endpoint; ``created_at`` is kept for keyset pagination."""
+    return areas.annotate(lng=Longitude("location"), lat=Latitude("location")).values(*LAYER_COLUMNS, "created_at")
+
+
+def layer_item(row):
+    """An AdoptAreaLayer-shaped dict built straight from a trusted database row."""
+    return {
+        "id": row["id"],
+        "area_name": row["area_name"],
+        "adoptee_name": row["adoptee_name"],
+        "email": row["email"],
+        "location": {"type": "Point", "coordinates": [row["lng"], row["lat"]]},
+        "city": row["city"],
+        "state": row["state"],
+        "country": row["country"],
+        "note": row["note"],
+    }
+
+
+def dumps(value):
+    """Compact JSON as bytes, using orjson when it is installed."""
+    with serialization():
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def encode_feature(row, property_names=LAYER_PROPERTIES):
+    feature_id, lng, lat, *properties = row
+    return json.dumps(
+        {
+            "type": "Feature",
+            "id": feature_id,
+            "geometry": {"type": "Point", "coordinates": [lng, lat]},
+            "properties": {"id": feature_id, **dict(zip(property_names, properties))},
+        },
+        separators=(",", ":"),
+    )
+
+
+def stream_feature_collection(rows, batch_size=500, property_names=LAYER_PROPERTIES):
+    """Yield a GeoJSON FeatureCollection piece by piece, ``batch_size`` features at a time."""
+    yield '{"type":"FeatureCollection","features":['
+    separator = ""
+    batch = []
+    for row in rows:
+        batch.append(encode_feature(row, property_names))
+        if len(batch) == batch_size:
+            yield separator + ",".join(batch)
+            separator = ","
+            batch = []
+    if batch:
+        yield separator + ",".join(batch)
+    yield "]}"
+
+
+async def astream_feature_collection(rows, batch_size=500, property_names=LAYER_PROPERTIES):
+    """stream_feature_collection over an async iterator of rows, such as ``QuerySet.aiterator()``."""
+    yield '{"type":"FeatureCollection","features":['
+    separator = ""
+    batch = []
+    async for row in rows:
+        batch.append(encode_feature(row, property_names))
+        if len(batch) == batch_size:
+            yield separator + ",".join(batch)
+            separator = ","
+            batch = []
+    if batch:
+        yield separator + ",".join(batch)
+    yield "]}"
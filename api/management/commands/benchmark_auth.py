@@ -0,0 +1,44 @@
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.auth import get_user_from_token, token_cache
+from api.benchmarking import benchmark_user, measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = "Counts the queries and time spent resolving X-Session-Token with a cold and a warm token cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = benchmark_user()
+            session = SessionStore()
+            session["_auth_user_id"] = str(user.pk)
+            session.create()
+            token = session.session_key
+
+            def cold():
+                token_cache.invalidate_token(token)
+                return get_user_from_token(token)
+
+            def warm():
+                return get_user_from_token(token)
+
+            rows = []
+            for label, resolve in (("cold", cold), ("warm", warm)):
+                warm()
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(options["requests"]):
+                        assert resolve() is not None
+                stats = measure(resolve, repeat=options["requests"])
+                rows.append((label, len(queries) / options["requests"], stats))
+
+            self.stdout.write(f"{'cache':>6} {'queries/req':>12} {'mean ms':>9} {'p95 ms':>8}")
+            for label, per_request, stats in rows:
+                self.stdout.write(f"{label:>6} {per_request:>12.2f} {stats['mean']:>9.3f} {stats['p95']:>8.3f}")
+            saved = rows[0][1] - rows[1][1]
+            self.stdout.write(self.style.SUCCESS(f"Queries saved per authenticated request: {saved:.2f}"))
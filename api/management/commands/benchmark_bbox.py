@@ -0,0 +1,51 @@
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from api.api import list_adopted_areas
+from api.benchmarking import analyze, benchmark_user, measure, rolled_back, seed_adopted_areas
+from api.geo import parse_bbox
+from api.models import AdoptedArea
+
+VIEWPORT = "-122.10,36.90,-121.90,37.00"
+BACKGROUND_EXTENT = (-80.0, 25.0, -70.0, 45.0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times /adopted-area-layer/?bbox= for a fixed viewport while the table grows. "
+        "All rows are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--in-viewport", type=int, default=200, help="Rows placed inside the viewport.")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/api/adopted-area-layer/", {"bbox": VIEWPORT})
+        viewport = parse_bbox(VIEWPORT)
+
+        def fetch_viewport():
+            return async_to_sync(list_adopted_areas)(request, bbox=VIEWPORT, limit=None, cursor=None)
+
+        with rolled_back():
+            user = benchmark_user()
+            seed_adopted_areas(options["in_viewport"], viewport.extent, user, seed=1)
+            total = options["in_viewport"]
+
+            self.stdout.write(f"{'rows':>10} {'in view':>8} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+            for size in sorted(options["sizes"]):
+                if size > total:
+                    seed_adopted_areas(size - total, BACKGROUND_EXTENT, user, seed=size)
+                    total = size
+                    analyze(AdoptedArea)
+
+                stats = measure(fetch_viewport, repeat=options["repeat"])
+                self.stdout.write(
+                    f"{total:>10} {options['in_viewport']:>8} "
+                    f"{stats['mean']:>9.2f} {stats['p50']:>8.2f} {stats['p95']:>8.2f}"
+                )
+
+            plan = AdoptedArea.objects.active().filter(location__within=viewport).explain()
+            self.stdout.write("\nQuery plan at the largest size:\n" + plan)
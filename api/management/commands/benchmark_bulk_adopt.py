@@ -0,0 +1,67 @@
+import json
+import random
+import time
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from api.benchmarking import benchmark_user, rolled_back
+
+
+def adoption_items(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "area_name": f"Beach {i}",
+            "adoptee_name": "Benchmark",
+            "email": "benchmark@example.com",
+            "location": {"type": "Point", "coordinates": [rng.uniform(-125, -117), rng.uniform(32, 42)]},
+            "city": "Bench",
+            "state": "Bench",
+            "country": "Bench",
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares N calls to POST /api/adopt-area/ with one POST /api/adopt-area/bulk/ of N items. "
+        "All rows are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        items = adoption_items(options["items"])
+
+        # Each pass starts from the same empty table: left in place, the single-request
+        # rows would make every bulk item fail the minimum spacing check.
+        with rolled_back():
+            client = self.client()
+            started = time.perf_counter()
+            for item in items:
+                response = client.post("/api/adopt-area/", json.dumps(item), content_type="application/json")
+                if response.status_code != 201:
+                    raise CommandError(f"Single adoption failed: {response.content!r}")
+            single = time.perf_counter() - started
+
+        with rolled_back():
+            client = self.client()
+            started = time.perf_counter()
+            response = client.post("/api/adopt-area/bulk/", json.dumps({"items": items}), content_type="application/json")
+            bulk = time.perf_counter() - started
+            if response.status_code != 201 or response.json()["failed"]:
+                raise CommandError(f"Bulk adoption failed: {response.content[:500]!r}")
+
+        self.stdout.write(f"{len(items)} single requests: {single:8.2f} s")
+        self.stdout.write(f"1 bulk request:        {bulk:8.2f} s ({bulk / single:.1%} of single)")
+
+    @staticmethod
+    def client():
+        session = SessionStore()
+        session["_auth_user_id"] = str(benchmark_user().pk)
+        session.create()
+        return Client(HTTP_HOST="localhost", HTTP_X_SESSION_TOKEN=session.session_key)
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarking import percentiles
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns ``(status, keep_alive)``."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection.")
+    version, status = status_line.split()[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        return int(status), False
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" or (version == b"HTTP/1.1" and connection != "close")
+    return int(status), keep_alive
+
+
+async def client(target, deadline, latencies, failures):
+    """One virtual user: sends requests back to back, reconnecting when the server closes."""
+    host, port, path = target
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode()
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            failures.append("connection")
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+            continue
+        if status >= 400:
+            failures.append(status)
+        else:
+            latencies.append((time.perf_counter() - started) * 1000)
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(target, concurrency, duration):
+    latencies, failures = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(client(target, deadline, latencies, failures) for _ in range(concurrency)))
+    return latencies, failures, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives a running server with many concurrent keep-alive clients and reports "
+        "requests per second and latency percentiles. Start the server under test first, e.g. "
+        "`gunicorn WebGIS.wsgi -w 4` or `uvicorn WebGIS.asgi:application --workers 4`; "
+        "scripts/compare_servers.sh runs both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Full URL to request, e.g. http://127.0.0.1:8000/api/teams/?limit=50")
+        parser.add_argument("--concurrency", type=int, default=500)
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+        parser.add_argument("--label", default="", help="Name printed in front of the result line.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http":
+            raise CommandError("Only plain http:// URLs are supported.")
+        path = url.path + (f"?{url.query}" if url.query else "")
+        target = (url.hostname, url.port or 80, path or "/")
+
+        latencies, failures, elapsed = asyncio.run(run_load(target, options["concurrency"], options["duration"]))
+        if not latencies:
+            raise CommandError(f"No successful responses ({len(failures)} failures).")
+
+        stats = percentiles(latencies)
+        label = options["label"] or options["url"]
+        self.stdout.write(
+            f"{label}: {len(latencies) / elapsed:.0f} req/s, "
+            f"p50 {stats['p50']:.1f} ms, p99 {stats['p99']:.1f} ms, max {stats['max']:.1f} ms, "
+            f"{len(failures)} failures, {options['concurrency']} clients, {elapsed:.0f} s"
+        )
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from api import metrics, timing
+from api.middleware import MetricsMiddleware
+
+ROUTES = [f"/api/route-{i}/" for i in range(20)]
+
+
+class Command(BaseCommand):
+    help = "Measures the per-request cost of recording metrics and of rendering the exposition."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200_000)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        metrics.reset()
+
+        started = time.perf_counter()
+        for i in range(count):
+            metrics.observe_request(ROUTES[i % len(ROUTES)], "GET", 200, 0.012, 3, 2048)
+        record_us = (time.perf_counter() - started) / count * 1e6
+
+        # The whole middleware around a view that does nothing.
+        response = HttpResponse(b"{}")
+        middleware = MetricsMiddleware(lambda request: response)
+        request = RequestFactory().get("/api/teams/")
+        started = time.perf_counter()
+        for _ in range(count):
+            middleware(request)
+        middleware_us = (time.perf_counter() - started) / count * 1e6
+        assert timing.current.get() is None
+
+        started = time.perf_counter()
+        text = metrics.render(metrics.collect())
+        render_ms = (time.perf_counter() - started) * 1000
+        metrics.reset()
+
+        self.stdout.write(f"observe_request      {record_us:>8.2f} us/request")
+        self.stdout.write(f"MetricsMiddleware    {middleware_us:>8.2f} us/request")
+        self.stdout.write(f"render ({len(ROUTES)} routes) {render_ms:>8.2f} ms, {len(text)} bytes")
+        if middleware_us > 5:
+            self.stdout.write(self.style.WARNING("Recording costs more than 5 us per request."))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarking import analyze, benchmark_user, measure, rolled_back, seed_adopted_areas
+from api.models import AdoptedArea
+from api.proximity import nearby_areas
+
+# A dense beach cluster inside a sparse coastline-sized extent.
+SPARSE_EXTENT = (-125.0, 32.0, -117.0, 42.0)
+DENSE_EXTENT = (-118.52, 34.00, -118.48, 34.04)
+DENSE_POINT = (-118.50, 34.02)
+SPARSE_POINT = (-123.5, 39.5)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times /adopted-areas/nearby/ in a dense and a sparse region while the table grows. "
+        "All rows are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--limits", nargs="+", type=int, default=[10, 100])
+        parser.add_argument("--radius-m", type=float, default=50_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = benchmark_user()
+            total = 0
+            self.stdout.write(f"{'rows':>10} {'region':>7} {'limit':>6} {'found':>6} {'p50 ms':>8} {'p95 ms':>8}")
+            for size in sorted(options["sizes"]):
+                # Keep one row in ten inside the dense cluster as the table grows.
+                dense = size // 10 - total // 10
+                seed_adopted_areas(dense, DENSE_EXTENT, user, seed=size)
+                seed_adopted_areas(size - total - dense, SPARSE_EXTENT, user, seed=size + 1)
+                total = size
+                analyze(AdoptedArea)
+
+                for region, (lng, lat) in (("dense", DENSE_POINT), ("sparse", SPARSE_POINT)):
+                    for limit in options["limits"]:
+                        def search():
+                            return nearby_areas(lng, lat, options["radius_m"], limit)
+
+                        found = len(search())
+                        stats = measure(search, repeat=options["repeat"])
+                        self.stdout.write(
+                            f"{total:>10} {region:>7} {limit:>6} {found:>6} {stats['p50']:>8.2f} {stats['p95']:>8.2f}"
+                        )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarking import analyze, benchmark_user, measure, rolled_back, seed_adopted_areas
+from api.models import AdoptedArea
+from api.pagination import PAGE_ORDERING, after_cursor, encode_cursor, paginate
+
+EXTENT = (-125.0, 32.0, -117.0, 42.0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares OFFSET and keyset (cursor) pagination of the adopted area layer at increasing depths. "
+        "All rows are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500_000)
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--depths", nargs="+", type=int, default=[0, 10_000, 100_000, 400_000])
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        size = options["page_size"]
+
+        with rolled_back():
+            seed_adopted_areas(options["rows"], EXTENT, benchmark_user())
+            analyze(AdoptedArea)
+            ordered = AdoptedArea.objects.active().order_by(*PAGE_ORDERING)
+
+            self.stdout.write(f"{'depth':>8} {'offset ms':>10} {'keyset ms':>10}")
+            for depth in options["depths"]:
+                if depth >= options["rows"]:
+                    continue
+
+                cursor = None
+                if depth:
+                    before = ordered.values("created_at", "id")[depth - 1]
+                    cursor = encode_cursor(before["created_at"], before["id"])
+
+                offset = measure(lambda: list(ordered[depth:depth + size]), repeat=options["repeat"])
+                keyset = measure(lambda: paginate(AdoptedArea.objects.active(), cursor, size), repeat=options["repeat"])
+                self.stdout.write(f"{depth:>8} {offset['p50']:>10.2f} {keyset['p50']:>10.2f}")
+
+            # Should be an Index Scan on adoptedarea_active_page_idx with a created_at lower
+            # bound as the Index Cond and a LIMIT, not a full scan followed by a sort.
+            if cursor:
+                plan = after_cursor(AdoptedArea.objects.active(), cursor).order_by(*PAGE_ORDERING)[:size + 1].explain()
+                self.stdout.write("\nKeyset query plan at the deepest page:\n" + plan)
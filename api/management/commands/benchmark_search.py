@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarking import analyze, benchmark_user, measure, rolled_back, seed_adopted_areas
+from api.models import AdoptedArea
+from api.search import area_results
+
+EXTENT = (-125.0, 32.0, -117.0, 42.0)
+# Seeded rows are named "Benchmark spot <n>" in city "Bench".
+QUERIES = {
+    "exact": "spot 4242",
+    "typo": "Benchmrk spot 4242",
+    "prefix": "spot 424",
+    "common": "bench",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the /search/ adopted area query for selective, misspelled and unselective terms "
+        "while the table grows. All rows are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = benchmark_user()
+            total = 0
+            self.stdout.write(f"{'rows':>10} {'query':>7} {'found':>6} {'p50 ms':>8} {'p95 ms':>8}")
+            for size in sorted(options["sizes"]):
+                seed_adopted_areas(size - total, EXTENT, user, seed=size)
+                total = size
+                analyze(AdoptedArea)
+
+                for label, text in QUERIES.items():
+                    def search():
+                        return list(area_results(AdoptedArea.objects.active(), text)[:options["limit"]])
+
+                    found = len(search())
+                    stats = measure(search, repeat=options["repeat"])
+                    self.stdout.write(f"{total:>10} {label:>7} {found:>6} {stats['p50']:>8.2f} {stats['p95']:>8.2f}")
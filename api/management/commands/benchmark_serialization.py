@@ -0,0 +1,90 @@
+import json
+import random
+import time
+from typing import List
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from ninja.responses import NinjaJSONEncoder
+from pydantic import TypeAdapter
+
+from api.geojson import dumps, layer_item, orjson
+from api.models import AdoptedArea
+from api.schemas import AdoptAreaLayer
+
+
+def sample_rows(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "id": i + 1,
+            "area_name": f"Benchmark spot {i}",
+            "adoptee_name": "Benchmark",
+            "email": f"volunteer{i % 500}@example.com",
+            "lng": rng.uniform(-180, 180),
+            "lat": rng.uniform(-90, 90),
+            "city": "Monterey",
+            "state": "CA",
+            "country": "USA",
+            "note": "",
+        }
+
+
+def pydantic_path(areas, adapter):
+    """What the layer endpoint used to do: one model per row, then Ninja's response validation."""
+    items = [
+        AdoptAreaLayer(
+            id=area.id,
+            area_name=area.area_name,
+            adoptee_name=area.adoptee_name,
+            email=area.email,
+            location={"type": "Point", "coordinates": [area.location.x, area.location.y]},
+            city=area.city,
+            state=area.state,
+            country=area.country,
+            note=area.note,
+        )
+        for area in areas
+    ]
+    return json.dumps(adapter.dump_python(adapter.validate_python(items, from_attributes=True)), cls=NinjaJSONEncoder)
+
+
+def fast_path(rows):
+    return dumps([layer_item(row) for row in rows])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-row cost of serializing /adopted-area-layer/ through pydantic models "
+        "against the direct .values() encoder. Runs in memory; no database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        count = options["rows"]
+        rows = list(sample_rows(count))
+        areas = [
+            AdoptedArea(location=Point(row["lng"], row["lat"], srid=4326), **{
+                key: value for key, value in row.items() if key not in ("lng", "lat")
+            })
+            for row in rows
+        ]
+        adapter = TypeAdapter(List[AdoptAreaLayer])
+
+        results = []
+        for label, run in (("pydantic", lambda: pydantic_path(areas, adapter)), ("direct", lambda: fast_path(rows))):
+            best = float("inf")
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                body = run()
+                best = min(best, time.perf_counter() - started)
+            results.append((label, best, len(body)))
+
+        self.stdout.write(f"encoder: {'orjson' if orjson else 'json'}, rows: {count}")
+        self.stdout.write(f"{'path':>9} {'total ms':>9} {'us/row':>8} {'bytes':>11}")
+        for label, seconds, size in results:
+            self.stdout.write(f"{label:>9} {seconds * 1000:>9.1f} {seconds * 1e6 / count:>8.2f} {size:>11}")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {results[0][1] / results[1][1]:.1f}x"))
@@ -0,0 +1,47 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.benchmarking import analyze, benchmark_user, measure, rolled_back, seed_adopted_areas
+from api.models import AdoptedArea
+from api.proximity import batch_spacing_conflicts, spacing_conflict
+
+EXTENT = (-125.0, 32.0, -117.0, 42.0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the ADOPTION_MIN_SPACING_M check for single writes and for a batch. "
+        "All rows are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--batch", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if not settings.ADOPTION_MIN_SPACING_M:
+            self.stdout.write("ADOPTION_MIN_SPACING_M is 0; the check is disabled.")
+            return
+
+        rng = random.Random(7)
+        min_lng, min_lat, max_lng, max_lat = EXTENT
+
+        def random_point():
+            return rng.uniform(min_lng, max_lng), rng.uniform(min_lat, max_lat)
+
+        with rolled_back():
+            seed_adopted_areas(options["rows"], EXTENT, benchmark_user())
+            analyze(AdoptedArea)
+
+            single = measure(lambda: spacing_conflict(*random_point()), repeat=options["repeat"])
+            batch = [(i, *random_point()) for i in range(options["batch"])]
+            batched = measure(lambda: batch_spacing_conflicts(batch), repeat=3, warmup=1)
+
+        self.stdout.write(f"single write check: p50 {single['p50']:.2f} ms, p95 {single['p95']:.2f} ms")
+        self.stdout.write(
+            f"batch of {options['batch']}: {batched['p50']:.1f} ms "
+            f"({batched['p50'] / options['batch']:.3f} ms per item)"
+        )
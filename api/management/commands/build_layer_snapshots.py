@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = "Renders the adopted area and team layers to versioned, pre-compressed GeoJSON files."
+
+    def handle(self, *args, **options):
+        manifest = build_snapshots()
+        for name, url in manifest["layers"].items():
+            self.stdout.write(f"{name}: {url}")
+        self.stdout.write(self.style.SUCCESS(f"Snapshot {manifest['version']} is now current."))
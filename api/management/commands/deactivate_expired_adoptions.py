@@ -1,16 +1,24 @@
 from django.core.management.base import BaseCommand
-from django.utils.timezone import now
-from api.models import AdoptedArea
+
+from api.expiry import expire_adoptions
+from api.tasks import expire_adoptions as expire_adoptions_task
+
 
 class Command(BaseCommand):
     help = 'Deactivates adopted areas with expired temporary adoption periods.'
 
-    def handle(self, *args, **kwargs):
-        today = now().date()
-        expired = AdoptedArea.objects.filter(
-            adoption_type="temporary",
-            end_date__lt=today,
-            is_active=True
-        )
-        count = expired.update(is_active=False)
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, help="Rows per transaction (default: ADOPTION_EXPIRY_CHUNK_SIZE).")
+        parser.add_argument("--enqueue", action="store_true", help="Hand the run to a Celery worker instead.")
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            result = expire_adoptions_task.delay()
+            self.stdout.write(self.style.SUCCESS(f'Queued expiry task {result.id}.'))
+            return
+
+        chunks = expire_adoptions(chunk_size=options["chunk_size"])
+        for number, chunk in enumerate(chunks, 1):
+            self.stdout.write(f'Chunk {number}: {chunk["rows"]} rows in {chunk["ms"]:.1f} ms')
+        count = sum(chunk["rows"] for chunk in chunks)
         self.stdout.write(self.style.SUCCESS(f'Deactivated {count} expired adopted areas.'))
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from tqdm import tqdm
+
+from api.adoption_io import FORMATS, detect_format, export_rows, write_rows
+from api.models import AdoptedArea
+
+
+class Command(BaseCommand):
+    help = "Exports adopted areas to CSV, GeoJSON or newline-delimited GeoJSON using a server-side cursor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write, or - for stdout.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--active-only", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--no-progress", action="store_true")
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        to_stdout = output == "-"
+        if to_stdout and not options["format"]:
+            raise CommandError("Writing to stdout needs --format.")
+        try:
+            fmt = options["format"] or detect_format(output)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        areas = AdoptedArea.objects.active() if options["active_only"] else AdoptedArea.objects.all()
+        rows = tqdm(
+            export_rows(areas, chunk_size=options["chunk_size"]),
+            unit=" rows",
+            disable=options["no_progress"] or to_stdout,
+            file=sys.stderr,
+        )
+
+        stream = sys.stdout if to_stdout else open(output, "w", newline="", encoding="utf-8")
+        try:
+            count = write_rows(rows, stream, fmt)
+        finally:
+            if not to_stdout:
+                stream.close()
+        if not to_stdout:
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} adopted areas to {output}."))
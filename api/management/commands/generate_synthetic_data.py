@@ -0,0 +1,165 @@
+import datetime
+import sys
+import time
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.gis.geos import Point
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import localdate, now
+from tqdm import tqdm
+
+from api import stats, versions
+from api.adoption_io import copy_available
+from api.benchmarking import analyze
+from api.models import AdoptedArea, Team
+from api.synthetic import Hotspots, adoption_rows, copy_adoption_rows, heavy_tailed_weights, leader_counts, team_sizes
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a deterministic synthetic dataset for load testing: users with sessions, "
+        "teams with realistic memberships and adoptions clustered along coastlines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--adoptions", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=50_000)
+        parser.add_argument("--teams", type=int, default=5_000)
+        parser.add_argument("--huge-teams", type=int, default=5, help="Teams with a tenth of all users as members.")
+        parser.add_argument("--sessions", type=int, default=1_000, help="Users that get a logged-in session.")
+        parser.add_argument("--hotspots", type=int, help="Beaches to cluster around; defaults to one per 500 adoptions.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="synthetic", help="Prefix of generated emails and usernames.")
+        parser.add_argument("--chunk-size", type=int, default=100_000, help="Adoptions per COPY transaction.")
+        parser.add_argument("--tokens-out", help="Write the session tokens to this file, one per line.")
+        parser.add_argument("--no-progress", action="store_true")
+
+    def handle(self, *args, **options):
+        if not copy_available():
+            raise CommandError("generate_synthetic_data needs a PostgreSQL database.")
+        if options["users"] < 1:
+            raise CommandError("--users must be at least 1.")
+        prefix = options["prefix"].lower()
+        if User.objects.filter(email=f"{prefix}0@example.com").exists():
+            raise CommandError(f"Data with prefix {prefix!r} already exists; pass another --prefix.")
+
+        rng = np.random.default_rng(options["seed"])
+        started = time.perf_counter()
+        hotspots = Hotspots(rng, options["hotspots"] or max(100, options["adoptions"] // 500))
+
+        user_ids, emails, names = self.create_users(prefix, options["users"])
+        self.log(started, f"{len(user_ids)} users")
+        tokens = self.create_sessions(rng, user_ids, options["sessions"], options["tokens_out"])
+        self.log(started, f"{len(tokens)} sessions")
+        memberships = self.create_teams(rng, hotspots, prefix, user_ids, options["teams"], options["huge_teams"])
+        self.log(started, f"{options['teams']} teams, {memberships} memberships")
+
+        owners = (user_ids, emails, names, heavy_tailed_weights(rng, len(user_ids)))
+        self.create_adoptions(rng, hotspots, owners, options)
+        self.log(started, f"{options['adoptions']} adoptions")
+
+        stats.reconcile()
+        versions.bump(versions.TEAMS)
+        for model in (User, Team, Team.members.through, Team.leaders.through, AdoptedArea):
+            analyze(model)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.perf_counter() - started:.1f}s. "
+            "Run build_layer_snapshots to refresh the layer snapshots."
+        ))
+
+    def log(self, started, message):
+        self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {message}")
+
+    def create_users(self, prefix, count):
+        users = [
+            User(
+                username=f"{prefix}{i}",
+                email=f"{prefix}{i}@example.com",
+                first_name="Synthetic",
+                last_name=f"Volunteer {i}",
+                password=UNUSABLE_PASSWORD_PREFIX,
+            )
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        return (
+            np.array([user.pk for user in users]),
+            np.array([user.email for user in users], dtype=object),
+            np.array([f"Synthetic Volunteer {i}" for i in range(count)], dtype=object),
+        )
+
+    def create_sessions(self, rng, user_ids, count, tokens_out):
+        count = min(count, len(user_ids))
+        store = SessionStore()
+        expire_date = now() + datetime.timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        sessions = [
+            Session(
+                session_key=rng.bytes(16).hex(),
+                session_data=store.encode({"_auth_user_id": str(user_id)}),
+                expire_date=expire_date,
+            )
+            for user_id in rng.choice(user_ids, size=count, replace=False)
+        ]
+        Session.objects.bulk_create(sessions, batch_size=BATCH_SIZE)
+        tokens = [session.session_key for session in sessions]
+        if tokens_out:
+            with open(tokens_out, "w") as f:
+                f.writelines(f"{token}\n" for token in tokens)
+        return tokens
+
+    def create_teams(self, rng, hotspots, prefix, user_ids, count, huge):
+        sizes = team_sizes(rng, count, len(user_ids), huge=min(huge, count))
+        leaders = leader_counts(rng, sizes)
+        hq_spots = rng.choice(len(hotspots), size=count, p=hotspots.weights)
+
+        teams = []
+        for i, spot in enumerate(hq_spots):
+            country, state, city = hotspots.place(spot)
+            teams.append(Team(
+                name=f"{prefix.title()} team {i}",
+                description="Synthetic team for load testing.",
+                headquarters=Point(float(hotspots.lng[spot]), float(hotspots.lat[spot]), srid=4326),
+                city=city,
+                state=state,
+                country=country,
+            ))
+        with transaction.atomic():
+            Team.objects.bulk_create(teams, batch_size=BATCH_SIZE)
+
+            member_rows, leader_rows = [], []
+            for team, size, leader_count in zip(teams, sizes, leaders):
+                members = rng.choice(user_ids, size=size, replace=False)
+                member_rows.extend(self.through_rows(Team.members, team, members))
+                # Leaders are always members too.
+                leader_rows.extend(self.through_rows(Team.leaders, team, members[:leader_count]))
+            Team.members.through.objects.bulk_create(member_rows, batch_size=BATCH_SIZE)
+            Team.leaders.through.objects.bulk_create(leader_rows, batch_size=BATCH_SIZE)
+        return len(member_rows)
+
+    @staticmethod
+    def through_rows(descriptor, team, user_ids):
+        field = descriptor.field
+        team_column = f"{field.m2m_field_name()}_id"
+        user_column = f"{field.m2m_reverse_field_name()}_id"
+        return [descriptor.through(**{team_column: team.pk, user_column: int(user_id)}) for user_id in user_ids]
+
+    def create_adoptions(self, rng, hotspots, owners, options):
+        today, created_now = localdate(), now()
+        total, chunk_size = options["adoptions"], options["chunk_size"]
+        with tqdm(total=total, unit=" rows", disable=options["no_progress"], file=sys.stderr) as progress:
+            for first in range(0, total, chunk_size):
+                size = min(chunk_size, total - first)
+                rows = adoption_rows(rng, hotspots, owners, first, size, today, created_now)
+                with transaction.atomic():
+                    copy_adoption_rows(rows, versions.bump(versions.ADOPTED_AREAS))
+                progress.update(size)
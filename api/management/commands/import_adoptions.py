@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from tqdm import tqdm
+
+from api.adoption_io import FORMATS, OwnerResolver, build_batch, copy_available, detect_format, insert_areas, read_items
+
+User = get_user_model()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Checkpoint:
+    """Progress of an import, written after every committed batch so it can be resumed."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as f:
+            state = json.load(f)
+        if state.get("source") != self.source:
+            raise CommandError(f"Checkpoint {self.path} belongs to {state.get('source')}, not {self.source}.")
+        return state["processed"]
+
+    def save(self, processed):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"source": self.source, "processed": processed}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Command(BaseCommand):
+    help = "Imports adopted areas from CSV, GeoJSON or newline-delimited GeoJSON in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--owner", help="Email of the user owning rows without an owner_email.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Validate every row without writing.")
+        parser.add_argument(
+            "--allow-overlap", action="store_true", help="Skip the ADOPTION_MIN_SPACING_M check."
+        )
+        parser.add_argument("--copy", action="store_true", help="Insert with PostgreSQL COPY instead of bulk_create.")
+        parser.add_argument("--checkpoint", help="Checkpoint file; defaults to <path>.checkpoint.")
+        parser.add_argument("--resume", action="store_true", help="Skip the rows recorded in the checkpoint.")
+        parser.add_argument("--show-errors", type=int, default=20, help="How many invalid rows to print.")
+        parser.add_argument("--no-progress", action="store_true")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        from_stdin = path == "-"
+        if from_stdin and (options["resume"] or not options["format"]):
+            raise CommandError("Reading stdin needs --format and cannot be resumed.")
+        if options["copy"] and not copy_available():
+            raise CommandError("--copy needs a PostgreSQL database.")
+
+        try:
+            fmt = options["format"] or detect_format(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        owner = None
+        if options["owner"]:
+            owner = User.objects.filter(email=options["owner"].lower()).first()
+            if owner is None:
+                raise CommandError(f"No user with email {options['owner']}.")
+
+        checkpoint = Checkpoint(
+            None if from_stdin or options["dry_run"] else options["checkpoint"] or f"{path}.checkpoint",
+            None if from_stdin else os.path.abspath(path),
+        )
+        skip = checkpoint.load() if options["resume"] else 0
+
+        stream = sys.stdin if from_stdin else open(path, newline="", encoding="utf-8")
+        try:
+            created, failed, shown = self.run_import(stream, fmt, owner, checkpoint, skip, options)
+        finally:
+            if not from_stdin:
+                stream.close()
+
+        if not options["dry_run"]:
+            checkpoint.clear()
+        verb = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {created} adopted areas; {failed} rows invalid."))
+        if failed > shown:
+            self.stdout.write(f"({failed - shown} more invalid rows not shown)")
+
+    def run_import(self, stream, fmt, owner, checkpoint, skip, options):
+        owners = OwnerResolver(default_owner=owner)
+        items = read_items(stream, fmt)
+        for _ in islice(items, skip):
+            pass
+
+        processed, created, failed, shown = skip, 0, 0, 0
+        with tqdm(unit=" rows", initial=skip, disable=options["no_progress"], file=sys.stderr) as progress:
+            for batch in batched(items, options["batch_size"]):
+                # One transaction per batch, so the spacing locks cover the insert.
+                with transaction.atomic():
+                    areas, errors = build_batch(batch, owners, check_spacing=not options["allow_overlap"])
+                    if not options["dry_run"] and areas:
+                        insert_areas(areas, use_copy=options["copy"])
+                for offset, message in errors:
+                    if shown < options["show_errors"]:
+                        self.stderr.write(f"Row {processed + offset + 1}: {message}")
+                        shown += 1
+                processed += len(batch)
+                created += len(areas)
+                failed += len(errors)
+                if not options["dry_run"]:
+                    checkpoint.save(processed)
+                progress.update(len(batch))
+        return created, failed, shown
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts the adoption statistics rollup from the adopted areas table. "
+        "Run it periodically to repair drift from writes that skipped the stats hooks."
+    )
+
+    def handle(self, *args, **options):
+        drifted = reconcile()
+        if drifted:
+            self.stdout.write(self.style.WARNING(f"Repaired {drifted} drifted statistics groups."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Adoption statistics are up to date."))
@@ -0,0 +1,181 @@
+"""In-process request metrics with a Prometheus text exposition.
+
+api.middleware.MetricsMiddleware records one observation per request: count, 5xx
+errors, a latency histogram, queries and response bytes, keyed by route and method.
+Recording only updates lists in a dict under a lock; nothing is formatted until the
+metrics endpoint is scraped.
+
+With METRICS["MULTIPROCESS_DIR"] set, every worker process also writes its totals to
+``<dir>/metrics-<pid>.json`` at most every FLUSH_S seconds and on exit, and a scrape
+on any worker adds up the files of all workers. Clear the directory when the server
+starts, as a restarted worker may take over an old pid and reset that file.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+# Histogram bucket upper bounds in seconds; the last slot counts everything above them.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNT, ERRORS, SECONDS, QUERIES, BYTES, FIRST_BUCKET = range(6)
+ROUTE_SLOTS = FIRST_BUCKET + len(LATENCY_BUCKETS) + 1
+
+# Any other method is recorded as "other", so made-up methods cannot grow the table.
+METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+# Counters outside the per-route table, with their HELP text.
+COUNTERS = {
+    "auth_token_cache_hits_total": "Session tokens resolved from the token cache.",
+    "auth_token_cache_misses_total": "Session tokens that had to be looked up in the database.",
+}
+
+_lock = threading.Lock()
+_routes = {}
+_counters = dict.fromkeys(COUNTERS, 0)
+_next_flush = 0.0
+
+
+def observe_request(route, method, status, seconds, queries, nbytes):
+    """Record one finished request."""
+    key = (route, method if method in METHODS else "other")
+    bucket = FIRST_BUCKET + bisect.bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        stats = _routes.get(key)
+        if stats is None:
+            stats = _routes[key] = [0] * ROUTE_SLOTS
+        stats[COUNT] += 1
+        if status >= 500:
+            stats[ERRORS] += 1
+        stats[SECONDS] += seconds
+        stats[QUERIES] += queries
+        stats[BYTES] += nbytes
+        stats[bucket] += 1
+    if _next_flush and time.monotonic() >= _next_flush:
+        flush()
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot():
+    """This process's metrics as plain JSON-able data."""
+    with _lock:
+        return {
+            "routes": [[route, method, list(stats)] for (route, method), stats in _routes.items()],
+            "counters": dict(_counters),
+        }
+
+
+def reset():
+    with _lock:
+        _routes.clear()
+        _counters.update(dict.fromkeys(COUNTERS, 0))
+
+
+# -------------------- Multiprocess mode --------------------
+def multiprocess_dir():
+    return settings.METRICS["MULTIPROCESS_DIR"]
+
+
+def enable_multiprocess():
+    """Start writing this process's totals to the multiprocess directory."""
+    global _next_flush
+    if not multiprocess_dir() or _next_flush:
+        return
+    os.makedirs(multiprocess_dir(), exist_ok=True)
+    _next_flush = time.monotonic() + settings.METRICS["FLUSH_S"]
+    atexit.register(flush)
+
+
+def flush():
+    """Write this process's totals to its file in the multiprocess directory."""
+    global _next_flush
+    directory = multiprocess_dir()
+    if not directory:
+        return
+    _next_flush = time.monotonic() + settings.METRICS["FLUSH_S"]
+    path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(temp_path, path)
+
+
+def collect():
+    """Metrics of every worker, or of this process alone outside multiprocess mode."""
+    directory = multiprocess_dir()
+    if not directory:
+        return snapshot()
+
+    flush()
+    routes = {}
+    counters = dict.fromkeys(COUNTERS, 0)
+    for name in os.listdir(directory):
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A worker may be exiting or the file may be from an older layout.
+            continue
+        for route, method, stats in data["routes"]:
+            total = routes.setdefault((route, method), [0] * ROUTE_SLOTS)
+            for i, value in enumerate(stats[:ROUTE_SLOTS]):
+                total[i] += value
+        for counter, value in data["counters"].items():
+            if counter in counters:
+                counters[counter] += value
+    return {
+        "routes": [[route, method, stats] for (route, method), stats in routes.items()],
+        "counters": counters,
+    }
+
+
+# -------------------- Exposition --------------------
+def _labels(route, method):
+    route = route.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'route="{route}",method="{method}"'
+
+
+def render(data):
+    """Format collected metrics in the Prometheus text exposition format (0.0.4)."""
+    routes = sorted(data["routes"])
+    lines = []
+
+    def family(name, kind, help_text, slot):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for route, method, stats in routes:
+            lines.append(f"{name}{{{_labels(route, method)}}} {stats[slot]}")
+
+    family("http_requests_total", "counter", "Requests handled, by route and method.", COUNT)
+    family("http_request_errors_total", "counter", "Requests answered with a 5xx status.", ERRORS)
+    family("http_request_db_queries_total", "counter", "Database queries issued by requests.", QUERIES)
+    family("http_response_bytes_total", "counter", "Response body bytes sent.", BYTES)
+
+    name = "http_request_duration_seconds"
+    lines.append(f"# HELP {name} Request latency.")
+    lines.append(f"# TYPE {name} histogram")
+    for route, method, stats in routes:
+        labels = _labels(route, method)
+        cumulative = 0
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            cumulative += stats[FIRST_BUCKET + i]
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats[COUNT]}')
+        lines.append(f"{name}_sum{{{labels}}} {stats[SECONDS]:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {stats[COUNT]}")
+
+    for counter, help_text in COUNTERS.items():
+        lines.append(f"# HELP {counter} {help_text}")
+        lines.append(f"# TYPE {counter} counter")
+        lines.append(f"{counter} {data['counters'].get(counter, 0)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,181 @@
+import os
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.string_utils import ensure_leading_trailing_slash
+
+from . import metrics, timing
+
+
+async def aiterate(iterable):
+    """Yield from a blocking iterator, reading each item in a worker thread."""
+    iterator = iter(iterable)
+    done = object()
+    read = sync_to_async(next, thread_sensitive=False)
+    while (item := await read(iterator, done)) is not done:
+        yield item
+
+
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also serves layer snapshots written after the process started.
+
+    WhiteNoise indexes its files once at startup, so snapshot URLs are looked up on
+    disk per request instead. Their names carry a content hash, so they are immutable.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.snapshot_prefix = ensure_leading_trailing_slash(settings.LAYER_SNAPSHOT_URL)
+        self.directories.append((os.path.abspath(settings.LAYER_SNAPSHOT_ROOT) + os.sep, self.snapshot_prefix))
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def on_disk(self, path):
+        return self.autorefresh or path.startswith(self.snapshot_prefix)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        path = request.path_info
+        static_file = self.find_file(path) if self.on_disk(path) else self.files.get(path)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # WhiteNoise itself is sync only; without this the whole chain after it would be
+        # adapted to run in a thread under ASGI.
+        path = request.path_info
+        if self.on_disk(path):
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(path)
+        else:
+            static_file = self.files.get(path)
+        if static_file is None:
+            return await self.get_response(request)
+        response = await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        if response.streaming:
+            # ASGI would otherwise read a sync file body into memory in one go.
+            response.streaming_content = aiterate(response.streaming_content)
+        return response
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.snapshot_prefix):
+            return True
+        return super().immutable_file_test(path, url)
+
+
+class RequestTimingMiddleware:
+    """Count queries and time each sampled request, configured by REQUEST_TIMING.
+
+    Adds a ``Server-Timing`` header (db, ser, total) and logs one line per request to
+    ``api.timing``, at WARNING when it is over MAX_QUERIES or SLOW_MS.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.options = settings.REQUEST_TIMING
+        if not self.options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        timing.install()
+
+    def sampled(self):
+        rate = self.options["SAMPLE_RATE"]
+        return rate >= 1 or random.random() < rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            measured = timing.finish(token)
+        timing.report(request, response, measured, self.options)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            measured = timing.finish(token)
+        timing.report(request, response, measured, self.options)
+        return response
+
+
+class MetricsMiddleware:
+    """Record every request in api.metrics, configured by METRICS.
+
+    Install it first so it also sees snapshot files and requests rejected by other
+    middleware. Query counts come from the api.timing hooks.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        timing.install()
+        metrics.enable_multiprocess()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            measured = timing.finish(token)
+        self.record(request, response, measured)
+        return response
+
+    async def __acall__(self, request):
+        token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            measured = timing.finish(token)
+        self.record(request, response, measured)
+        return response
+
+    @staticmethod
+    def record(request, response, measured):
+        match = getattr(request, "resolver_match", None)
+        # Unresolved paths share one label so scanners cannot grow the route table.
+        route = f"/{match.route}" if match is not None else "unmatched"
+        if response.has_header("Content-Length"):
+            nbytes = int(response["Content-Length"])
+        elif response.streaming:
+            nbytes = 0
+        else:
+            nbytes = len(response.content)
+        metrics.observe_request(
+            route,
+            request.method,
+            response.status_code,
+            measured.total_ms() / 1000,
+            measured.queries,
+            nbytes,
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 09:12
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_team_city_team_country_team_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=django.contrib.postgres.indexes.GistIndex(condition=models.Q(('is_active', True)), fields=['location'], name='adoptedarea_active_loc_gist'),
+        ),
+    ]
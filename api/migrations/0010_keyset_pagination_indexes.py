@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-16 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_adoptedarea_active_loc_gist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='adoptedarea_active_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['created_at', 'id'], name='team_page_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        # Expression index on the geography cast used by api.proximity for meter-based KNN searches.
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX IF NOT EXISTS adoptedarea_active_geog_gist '
+                'ON api_adoptedarea USING GIST ((location::geography)) WHERE is_active'
+            ),
+            reverse_sql='DROP INDEX IF EXISTS adoptedarea_active_geog_gist',
+        ),
+    ]
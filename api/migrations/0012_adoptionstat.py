@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-16 14:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+STAT_FIELDS = ("country", "state", "city", "adoption_type", "is_active")
+
+
+def fill_adoption_stats(apps, schema_editor):
+    AdoptedArea = apps.get_model("api", "AdoptedArea")
+    AdoptionStat = apps.get_model("api", "AdoptionStat")
+    rows = AdoptedArea.objects.order_by().values(*STAT_FIELDS).annotate(n=Count("id"))
+    AdoptionStat.objects.bulk_create(
+        [AdoptionStat(**{field: row[field] for field in STAT_FIELDS}, count=row["n"]) for row in rows],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_adoptedarea_active_geog_gist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdoptionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('city', models.CharField(max_length=100)),
+                ('adoption_type', models.CharField(max_length=20)),
+                ('is_active', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('country', 'state', 'city', 'adoption_type', 'is_active'), name='adoptionstat_group_unique')],
+            },
+        ),
+        migrations.RunPython(fill_adoption_stats, migrations.RunPython.noop),
+    ]
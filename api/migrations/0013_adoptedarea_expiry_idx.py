@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-16 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_adoptionstat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=models.Index(condition=models.Q(('adoption_type', 'temporary'), ('is_active', True)), fields=['end_date'], name='adoptedarea_expiry_idx'),
+        ),
+    ]
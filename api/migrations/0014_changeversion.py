@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-16 16:40
+
+from django.db import migrations, models
+from django.utils.timezone import now
+
+
+def create_versions(apps, schema_editor):
+    ChangeVersion = apps.get_model("api", "ChangeVersion")
+    for name in ("adopted_area", "team"):
+        ChangeVersion.objects.get_or_create(name=name, defaults={"version": 1, "changed_at": now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_adoptedarea_expiry_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-16 17:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_changeversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adoptedarea',
+            name='revision',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='adoptedarea',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=models.Index(fields=['revision'], name='adoptedarea_revision_idx'),
+        ),
+        migrations.CreateModel(
+            name='AdoptedAreaTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area_id', models.BigIntegerField()),
+                ('revision', models.BigIntegerField()),
+                ('reason', models.CharField(choices=[('deleted', 'Deleted'), ('deactivated', 'Deactivated'), ('expired', 'Expired')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['revision'], name='tombstone_revision_idx'), models.Index(fields=['created_at'], name='tombstone_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_adoptedarea_revision_tombstone'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('area_name', 'adoptee_name', 'city', 'state', 'country', config='simple'), name='adoptedarea_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['area_name'], name='adoptedarea_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['city'], name='adoptedarea_city_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='adoptedarea_email_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'description', 'city', config='simple'), name='team_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='team_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['city'], name='team_city_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adoptedarea',
+            index=models.Index(condition=models.Q(('adoption_type', 'temporary')), fields=['end_date', 'is_active'], name='adoptedarea_temp_end_idx'),
+        ),
+    ]
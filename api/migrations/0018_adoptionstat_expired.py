@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:40
+
+from django.db import migrations, models
+from django.db.models import BooleanField, Case, Count, Q, When
+from django.db.models.functions import TruncDate
+
+GROUP_FIELDS = ("country", "state", "city", "adoption_type", "is_active", "expired")
+
+
+def refill_adoption_stats(apps, schema_editor):
+    AdoptedArea = apps.get_model("api", "AdoptedArea")
+    AdoptionStat = apps.get_model("api", "AdoptionStat")
+    expired = Q(is_active=False, adoption_type="temporary", end_date__isnull=False, end_date__lt=TruncDate("updated_at"))
+    rows = (
+        AdoptedArea.objects.order_by()
+        .annotate(expired=Case(When(expired, then=True), default=False, output_field=BooleanField()))
+        .values(*GROUP_FIELDS)
+        .annotate(n=Count("id"))
+    )
+    AdoptionStat.objects.all().delete()
+    AdoptionStat.objects.bulk_create(
+        [AdoptionStat(**{field: row[field] for field in GROUP_FIELDS}, count=row["n"]) for row in rows],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_adoptedarea_temp_end_idx'),
+    ]
+
+    operations = [
+        # Expired totals come from the rollup now; adoptedarea_expiry_idx serves api.expiry.
+        migrations.RemoveIndex(
+            model_name='adoptedarea',
+            name='adoptedarea_temp_end_idx',
+        ),
+        migrations.RemoveConstraint(
+            model_name='adoptionstat',
+            name='adoptionstat_group_unique',
+        ),
+        migrations.AddField(
+            model_name='adoptionstat',
+            name='expired',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddConstraint(
+            model_name='adoptionstat',
+            constraint=models.UniqueConstraint(fields=('country', 'state', 'city', 'adoption_type', 'is_active', 'expired'), name='adoptionstat_group_unique'),
+        ),
+        migrations.RunPython(refill_adoption_stats, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import connection, models, transaction
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVector
+from django.db.models.functions import Upper
+from django.utils.timezone import localdate
 
 
 class CustomUserManager(UserManager):
@@ -25,6 +29,16 @@ class CustomUser(AbstractUser):
         super().save(*args, **kwargs)
 
 
+class AdoptedAreaQuerySet(models.QuerySet):
+    def active(self):
+        # Temporary adoptions past their end date are hidden even before api.expiry switches them off.
+        return self.filter(is_active=True).exclude(adoption_type="temporary", end_date__lt=localdate())
+
+    def expired(self, today=None):
+        """Still-active temporary adoptions whose end date has passed."""
+        return self.filter(is_active=True, adoption_type="temporary", end_date__lt=today or localdate())
+
+
 class AdoptedArea(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -47,11 +61,68 @@ class AdoptedArea(models.Model):
     state = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # ChangeVersion counter value of the write that last touched the row, see api.sync.
+    revision = models.BigIntegerField(default=0)
+
+    objects = AdoptedAreaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Map reads only ever look at active adoptions, so keep their GiST index small.
+            GistIndex(fields=["location"], condition=models.Q(is_active=True), name="adoptedarea_active_loc_gist"),
+            # Keyset pagination order, see api.pagination.
+            models.Index(fields=["created_at", "id"], condition=models.Q(is_active=True), name="adoptedarea_active_page_idx"),
+            # Lets the expiry task find due adoptions without scanning the table.
+            models.Index(
+                fields=["end_date"],
+                condition=models.Q(is_active=True, adoption_type="temporary"),
+                name="adoptedarea_expiry_idx",
+            ),
+            models.Index(fields=["revision"], name="adoptedarea_revision_idx"),
+            # Search, see api.search. The full-text expression must match AREA_SEARCH_VECTOR.
+            GinIndex(
+                SearchVector("area_name", "adoptee_name", "city", "state", "country", config="simple"),
+                name="adoptedarea_search_gin",
+            ),
+            GinIndex(fields=["area_name"], opclasses=["gin_trgm_ops"], name="adoptedarea_name_trgm"),
+            GinIndex(fields=["city"], opclasses=["gin_trgm_ops"], name="adoptedarea_city_trgm"),
+            # email__iexact lookups from the admin search.
+            models.Index(Upper("email"), name="adoptedarea_email_upper_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Bumping locks the counter row until commit, so revisions become visible in order.
+        with transaction.atomic():
+            self.revision = ChangeVersion.bump(ChangeVersion.ADOPTED_AREAS)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "revision", "updated_at"}
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.area_name} in {self.city}, {self.state}"
 
 
+class AdoptedAreaTombstone(models.Model):
+    """Marks an adoption that left the layer, so delta sync can tell clients to drop it."""
+    area_id = models.BigIntegerField()
+    revision = models.BigIntegerField()
+    reason = models.CharField(
+        max_length=20,
+        choices=[("deleted", "Deleted"), ("deactivated", "Deactivated"), ("expired", "Expired")],
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["revision"], name="tombstone_revision_idx"),
+            models.Index(fields=["created_at"], name="tombstone_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Adopted area {self.area_id} {self.reason} at revision {self.revision}"
+
+
 class Team(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -63,6 +134,15 @@ class Team(models.Model):
     members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="teams", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="team_page_idx"),
+            # Search, see api.search. The full-text expression must match TEAM_SEARCH_VECTOR.
+            GinIndex(SearchVector("name", "description", "city", config="simple"), name="team_search_gin"),
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="team_name_trgm"),
+            GinIndex(fields=["city"], opclasses=["gin_trgm_ops"], name="team_city_trgm"),
+        ]
+
     def add_leader(self, user):
         if self.leaders.count() >= 5:
             raise ValueError("Maximum of 5 leaders allowed.")
@@ -70,3 +150,63 @@ class Team(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class AdoptionStat(models.Model):
+    """Running count of adoptions per place, type, active flag and expiry.
+
+    Maintained incrementally by api.stats; ``reconcile_adoption_stats`` rebuilds it.
+    """
+    country = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    adoption_type = models.CharField(max_length=20)
+    is_active = models.BooleanField()
+    # Switched off after the end date passed, see api.stats.EXPIRED.
+    expired = models.BooleanField(default=False)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["country", "state", "city", "adoption_type", "is_active", "expired"],
+                name="adoptionstat_group_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.city}, {self.state}, {self.country} ({self.adoption_type}): {self.count}"
+
+
+class ChangeVersion(models.Model):
+    """Write counter per published table, behind ETags (api.versions) and delta sync (api.sync)."""
+    ADOPTED_AREAS = "adopted_area"
+    TEAMS = "team"
+    # Highest revision whose tombstones have been pruned; older sync tokens must start over.
+    TOMBSTONE_FLOOR = "adopted_area_tombstone_floor"
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+    @classmethod
+    def bump(cls, name):
+        """Count a write to ``name`` and return the new version.
+
+        Inside a transaction the row stays locked until commit, so versions are handed
+        out in commit order.
+        """
+        table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (name, version, changed_at) VALUES (%s, 1, now())
+                ON CONFLICT (name) DO UPDATE SET version = {table}.version + 1, changed_at = now()
+                RETURNING version
+                """,
+                [name],
+            )
+            return cursor.fetchone()[0]
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
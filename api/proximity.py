@@ -0,0 +1,191 @@
+import math
+import zlib
+
+from django.conf import settings
+from django.db import connection
+from django.utils.timezone import localdate
+
+from .models import AdoptedArea
+
+# Distances are measured on the geography cast of ``location`` so radii are in meters.
+# Every predicate and ORDER BY below uses that exact expression so the planner can
+# answer it from the functional GiST index created in migration 0011.
+# ``NOT_EXPIRED`` mirrors AdoptedAreaQuerySet.active() so expired rows drop out before the expiry task runs.
+REFERENCE_POINT = "ST_SetSRID(ST_MakePoint(%(lng)s, %(lat)s), 4326)::geography"
+NOT_EXPIRED = "NOT ({0}adoption_type = 'temporary' AND {0}end_date IS NOT NULL AND {0}end_date < %(today)s)"
+
+NEARBY_SQL = f"""
+SELECT id, area_name, adoptee_name, email, city, state, country, note,
+       ST_X(location) AS lng, ST_Y(location) AS lat,
+       ST_Distance(location::geography, {REFERENCE_POINT}) AS distance_m
+FROM {AdoptedArea._meta.db_table}
+WHERE is_active AND {NOT_EXPIRED.format("")}
+  AND ST_DWithin(location::geography, {REFERENCE_POINT}, %(radius_m)s)
+ORDER BY location::geography <-> {REFERENCE_POINT}
+LIMIT %(limit)s
+"""
+
+SPACING_CONFLICT_SQL = f"""
+SELECT id
+FROM {AdoptedArea._meta.db_table}
+WHERE is_active AND {NOT_EXPIRED.format("")}
+  AND ST_DWithin(location::geography, {REFERENCE_POINT}, %(spacing_m)s) AND id <> %(exclude_id)s
+LIMIT 1
+"""
+
+# One round trip for a whole batch: each point probes the geography index once.
+BATCH_SPACING_CONFLICT_SQL = f"""
+SELECT DISTINCT ON (p.idx) p.idx, a.id
+FROM unnest(%(lngs)s::float8[], %(lats)s::float8[]) WITH ORDINALITY AS p(lng, lat, idx)
+JOIN {AdoptedArea._meta.db_table} a
+  ON a.is_active AND {NOT_EXPIRED.format("a.")}
+ AND ST_DWithin(a.location::geography, ST_SetSRID(ST_MakePoint(p.lng, p.lat), 4326)::geography, %(spacing_m)s)
+ORDER BY p.idx, a.id
+"""
+
+# Locks every spacing grid cell in a list, in the order given.
+LOCK_CELLS_SQL = "SELECT pg_advisory_xact_lock(key) FROM unnest(%s::bigint[]) AS key"
+# High half of the advisory lock keys of spacing cells; the low half is the cell's CRC32.
+SPACING_LOCK_CLASS = 0x73706163
+
+EARTH_RADIUS_M = 6_371_008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def nearby_areas(lng, lat, radius_m, limit):
+    """Closest active adoptions within ``radius_m`` meters, nearest first.
+
+    The ``<->`` ordering walks the index outward from the point and stops after
+    ``limit`` rows, so the cost follows ``limit`` rather than the table size.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(NEARBY_SQL, {"lng": lng, "lat": lat, "radius_m": radius_m, "limit": limit, "today": localdate()})
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    # <-> ranks on a sphere, ST_Distance reports on the spheroid; keep the reported order consistent.
+    rows.sort(key=lambda row: row["distance_m"])
+    return rows
+
+
+# -------------------- Minimum spacing between adoptions --------------------
+def spacing_conflict(lng, lat, exclude_id=None):
+    """Id of an active adoption closer than ADOPTION_MIN_SPACING_M, or None."""
+    spacing_m = settings.ADOPTION_MIN_SPACING_M
+    if not spacing_m:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SPACING_CONFLICT_SQL,
+            {"lng": lng, "lat": lat, "spacing_m": spacing_m, "exclude_id": exclude_id or 0, "today": localdate()},
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def locked_spacing_conflict(lng, lat, exclude_id=None):
+    """``spacing_conflict`` that also sees adoptions other transactions are saving.
+
+    Call inside the transaction that saves the point and the lock is held until it
+    commits, so a concurrent adoption next to it waits and then finds this one.
+    """
+    lock_spacing_cells([(lng, lat)])
+    return spacing_conflict(lng, lat, exclude_id=exclude_id)
+
+
+def lock_spacing_cells(points):
+    """Take transaction-level advisory locks on the grid cells around ``(lng, lat)`` points.
+
+    Each point locks every cell within the spacing of it, so two points closer than the
+    spacing share a locked cell (the one holding either point) and the second checker
+    waits for the first to commit. Collisions between keys only make unrelated points
+    wait on each other.
+    """
+    spacing_m = settings.ADOPTION_MIN_SPACING_M
+    if not spacing_m or not points:
+        return
+    grid = SpacingGrid(spacing_m)
+    cells = {cell for lng, lat in points for cell in grid.cells_near(lng, lat)}
+    # Sorted, so two batches never take the same locks in opposite orders.
+    keys = sorted(SPACING_LOCK_CLASS << 32 | zlib.crc32(f"{col}:{row}".encode()) for col, row in cells)
+    with connection.cursor() as cursor:
+        cursor.execute(LOCK_CELLS_SQL, [keys])
+
+
+def haversine_m(lng1, lat1, lng2, lat2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class SpacingGrid:
+    """Uniform lng/lat grid for finding points closer than ``spacing_m`` within a batch.
+
+    Cells are ``spacing_m`` tall; away from the equator a degree of longitude shrinks,
+    so lookups scan proportionally more cells east and west.
+    """
+
+    def __init__(self, spacing_m):
+        self.spacing_m = spacing_m
+        self.cell = spacing_m / METERS_PER_DEGREE
+        self._cells = {}
+
+    def _key(self, lng, lat):
+        return math.floor(lng / self.cell), math.floor(lat / self.cell)
+
+    def add(self, key, lng, lat):
+        self._cells.setdefault(self._key(lng, lat), []).append((key, lng, lat))
+
+    def cells_near(self, lng, lat):
+        """Every cell that can hold a point within ``spacing_m`` of the given one."""
+        col, row = self._key(lng, lat)
+        lng_span = math.ceil(1 / max(math.cos(math.radians(lat)), 0.01))
+        for d_row in (-1, 0, 1):
+            for d_col in range(-lng_span, lng_span + 1):
+                yield col + d_col, row + d_row
+
+    def nearest_within(self, lng, lat):
+        """Key of a stored point within ``spacing_m`` of the given one, or None."""
+        for cell in self.cells_near(lng, lat):
+            for key, other_lng, other_lat in self._cells.get(cell, ()):
+                if haversine_m(lng, lat, other_lng, other_lat) < self.spacing_m:
+                    return key
+        return None
+
+
+def batch_spacing_conflicts(points):
+    """Check ``(key, lng, lat)`` points against the database and against each other.
+
+    Returns ``{key: message}`` for points that break the spacing rule. Earlier points
+    in the batch win over later ones. Call inside the transaction that inserts the
+    points; see ``lock_spacing_cells``.
+    """
+    spacing_m = settings.ADOPTION_MIN_SPACING_M
+    if not spacing_m or not points:
+        return {}
+
+    lock_spacing_cells([(lng, lat) for _, lng, lat in points])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            BATCH_SPACING_CONFLICT_SQL,
+            {
+                "lngs": [lng for _, lng, _ in points],
+                "lats": [lat for _, _, lat in points],
+                "spacing_m": spacing_m,
+                "today": localdate(),
+            },
+        )
+        in_database = {idx - 1: area_id for idx, area_id in cursor.fetchall()}
+
+    grid = SpacingGrid(spacing_m)
+    conflicts = {}
+    for position, (key, lng, lat) in enumerate(points):
+        if position in in_database:
+            conflicts[key] = f"Within {spacing_m:g} m of active adopted area {in_database[position]}."
+            continue
+        other = grid.nearest_within(lng, lat)
+        if other is not None:
+            conflicts[key] = f"Within {spacing_m:g} m of item {other} in the same batch."
+            continue
+        grid.add(key, lng, lat)
+    return conflicts
@@ -0,0 +1,100 @@
+"""Send read-only endpoints to read replicas, keeping a client's own writes visible to it.
+
+Views wrapped in ``read_replica`` pick one replica per request and ReplicaRouter sends
+every read of that request there; everything else, and every write, uses ``default``.
+A session token that has just written is pinned to ``default`` for
+DATABASE_REPLICAS["PIN_S"] seconds, so its next reads cannot miss the write on a
+lagging replica. Pins live in the Django cache, which must be shared between workers
+for them to hold across processes.
+"""
+import functools
+import inspect
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+current = ContextVar("read_replica", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # The database cache holds pins and revocations, which must be read where written.
+        if model._meta.app_label == "django_cache":
+            return None
+        return current.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def _pin_key(token):
+    return f"db:pin:{token}"
+
+
+def pin(token):
+    """Read from the primary for this session token for a while, after it writes."""
+    if token and replica_aliases():
+        cache.set(_pin_key(token), True, settings.DATABASE_REPLICAS["PIN_S"])
+
+
+async def apin(token):
+    if token and replica_aliases():
+        await cache.aset(_pin_key(token), True, settings.DATABASE_REPLICAS["PIN_S"])
+
+
+def _choose(request, pinned):
+    aliases = replica_aliases()
+    if not aliases or pinned:
+        return None
+    return random.choice(aliases)
+
+
+def _pinned(request):
+    token = request.headers.get("X-Session-Token")
+    return bool(token and replica_aliases() and cache.get(_pin_key(token)))
+
+
+async def _apinned(request):
+    token = request.headers.get("X-Session-Token")
+    return bool(token and replica_aliases() and await cache.aget(_pin_key(token)))
+
+
+def read_replica(view_func):
+    """Serve the view from one replica unless the client is pinned to the primary.
+
+    Put it outside conditional_get, so the ETag versions come from the same replica as
+    the rows and never run ahead of them.
+    """
+    if inspect.iscoroutinefunction(view_func):
+        @functools.wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            token = current.set(_choose(request, await _apinned(request)))
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                current.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        token = current.set(_choose(request, _pinned(request)))
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            current.reset(token)
+
+    return wrapper
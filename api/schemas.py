@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Optional, List, Literal, Tuple
+from typing import Any, Dict, Optional, List, Literal, Tuple
 from ninja import Schema
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from geojson_pydantic import Point
@@ -39,6 +39,11 @@ class AdoptAreaInput(BaseModel):
         return None if v in ("", None) else v
 
 
+# 🔹 Used to adopt many areas at once; items are validated one by one as AdoptAreaInput
+class AdoptAreaBulkInput(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=10000)
+
+
 # 🔹 Used to display adopted areas on the map
 class AdoptAreaLayer(BaseModel):
     id: int
@@ -52,6 +57,76 @@ class AdoptAreaLayer(BaseModel):
     note: str
 
 
+# 🔹 Used by /adopted-area-layer/changes/ to bring a client's copy of the layer up to date
+class AdoptedAreaChanges(BaseModel):
+    token: str
+    reset: bool
+    upserts: List[AdoptAreaLayer]
+    removed: List[int]
+
+
+# 🔹 Used by the "what is near me?" search
+class NearbyAdoptedArea(AdoptAreaLayer):
+    distance_m: float
+
+
+# 🔹 Used by /search/
+class AdoptedAreaSearchResult(BaseModel):
+    id: int
+    area_name: str
+    city: str
+    state: str
+    country: str
+    location: Point
+    rank: float
+
+
+class TeamSearchResult(BaseModel):
+    id: int
+    name: str
+    description: str
+    city: str
+    state: str
+    country: str
+    headquarters: Point
+    rank: float
+
+
+class SearchResults(BaseModel):
+    areas: List[AdoptedAreaSearchResult]
+    teams: List[TeamSearchResult]
+
+
+# 🔹 Used to display grouped adopted areas at low zoom levels
+class AdoptedAreaCluster(BaseModel):
+    centroid: Point
+    count: int
+    sample_ids: List[int]
+
+
+# 🔹 One row of /stats/adoptions/; state and city are only set when grouping by them
+class AdoptionStatGroup(BaseModel):
+    country: str
+    state: Optional[str] = None
+    city: Optional[str] = None
+    adoption_type: str
+    active: int
+    inactive: int
+
+
+class AdoptionStatTotals(BaseModel):
+    active: int
+    inactive: int
+    expired: int
+    deactivated: int
+
+
+# 🔹 Used by the dashboard statistics panel
+class AdoptionStatsOut(BaseModel):
+    totals: AdoptionStatTotals
+    groups: List[AdoptionStatGroup]
+
+
 # 🔹 Used to create a team
 class TeamCreate(Schema):
     name: str
@@ -74,6 +149,19 @@ class TeamOut(BaseModel):
     leader_ids: List[int]
 
 
+# 🔹 Used by /teams/?include=counts for teams too large to list every member
+class TeamCountsOut(BaseModel):
+    id: int
+    name: str
+    description: str
+    headquarters: Point
+    city: str
+    state: str
+    country: str
+    member_count: int
+    leader_count: int
+
+
 # 🔹 Used to request a user to become a team leader
 class LeaderRequest(Schema):
     user_id: int
@@ -0,0 +1,67 @@
+"""Ranked text search over adopted areas and teams.
+
+A row matches when its full-text document matches the query (``websearch`` syntax, so
+quotes and ``-word`` work) or when the query is word-similar to its name or city, which
+catches typos and partial words. The two predicates are served by the GIN full-text
+and trigram indexes on each model; the vectors here must stay identical to the indexed
+expressions in api.models or PostgreSQL falls back to scanning the table. The ``simple``
+configuration does no stemming, which suits place and team names in any language.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+from .geo import Latitude, Longitude, parse_bbox
+
+SEARCH_CONFIG = "simple"
+
+AREA_SEARCH_VECTOR = SearchVector("area_name", "adoptee_name", "city", "state", "country", config=SEARCH_CONFIG)
+AREA_TRIGRAM_FIELDS = ("area_name", "city")
+
+TEAM_SEARCH_VECTOR = SearchVector("name", "description", "city", config=SEARCH_CONFIG)
+TEAM_TRIGRAM_FIELDS = ("name", "city")
+
+
+def _match(queryset, text, vector, trigram_fields):
+    """Filter ``queryset`` to rows matching ``text`` and annotate them with a ``rank``."""
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    matches = Q(document=query)
+    for field in trigram_fields:
+        matches |= Q(**{f"{field}__trigram_word_similar": text})
+    similarity = Greatest(*(TrigramWordSimilarity(text, field) for field in trigram_fields))
+    return (
+        queryset.annotate(document=vector)
+        .filter(matches)
+        .annotate(rank=SearchRank(vector, query) + similarity)
+    )
+
+
+def search_areas(queryset, text, bbox=None):
+    """AdoptedArea rows of ``queryset`` matching ``text``, best first."""
+    if bbox:
+        queryset = queryset.filter(location__within=parse_bbox(bbox))
+    return _match(queryset, text, AREA_SEARCH_VECTOR, AREA_TRIGRAM_FIELDS).order_by("-rank", "id")
+
+
+def search_teams(queryset, text, bbox=None):
+    """Team rows of ``queryset`` matching ``text``, best first."""
+    if bbox:
+        queryset = queryset.filter(headquarters__within=parse_bbox(bbox))
+    return _match(queryset, text, TEAM_SEARCH_VECTOR, TEAM_TRIGRAM_FIELDS).order_by("-rank", "id")
+
+
+def area_results(queryset, text, bbox=None):
+    """Public search results: no contact details."""
+    return (
+        search_areas(queryset, text, bbox)
+        .annotate(lng=Longitude("location"), lat=Latitude("location"))
+        .values("id", "area_name", "city", "state", "country", "lng", "lat", "rank")
+    )
+
+
+def team_results(queryset, text, bbox=None):
+    return (
+        search_teams(queryset, text, bbox)
+        .annotate(lng=Longitude("headquarters"), lat=Latitude("headquarters"))
+        .values("id", "name", "description", "city", "state", "country", "lng", "lat", "rank")
+    )
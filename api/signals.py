@@ -0,0 +1,169 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model, user_logged_out
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import events, snapshots, stats, sync, tiles, versions
+from .auth import token_cache
+from .models import AdoptedArea, Team
+
+User = get_user_model()
+
+# Sent for AdoptedArea writes that bypass model signals (bulk_create, queryset .update()).
+# Receivers get ``areas`` (instances with at least id, location and stats.STAT_FIELDS loaded)
+# and ``action``, one of "create" or "deactivate"; "deactivate" also sends the
+# ``updated_at`` the rows were given.
+adopted_areas_bulk_changed = Signal()
+
+# Point field of each model that is drawn on the map.
+MAP_POINT_FIELDS = {AdoptedArea: "location", Team: "headquarters"}
+
+# Stored values that receivers compare against after an update.
+TRACKED_FIELDS = {AdoptedArea: ("location", *stats.STAT_FIELDS), Team: ("headquarters",)}
+
+
+@receiver(pre_save, sender=AdoptedArea)
+@receiver(pre_save, sender=Team)
+def remember_previous_values(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk:
+        instance._previous = sender.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS[sender]).first()
+
+
+# -------------------- Vector tile cache --------------------
+@receiver(post_save, sender=AdoptedArea)
+@receiver(post_save, sender=Team)
+def invalidate_saved_point_tiles(sender, instance, **kwargs):
+    field = MAP_POINT_FIELDS[sender]
+    previous = getattr(instance, "_previous", None)
+    points = [getattr(instance, field), previous and previous[field]]
+    # Wait for commit so a concurrent reader cannot re-cache the tile from the old rows.
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+
+@receiver(post_delete, sender=AdoptedArea)
+@receiver(post_delete, sender=Team)
+def invalidate_deleted_point_tiles(sender, instance, **kwargs):
+    points = [getattr(instance, MAP_POINT_FIELDS[sender])]
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+
+@receiver(adopted_areas_bulk_changed)
+def invalidate_bulk_changed_tiles(sender, areas, **kwargs):
+    points = [area.location for area in areas]
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+
+# -------------------- Layer snapshots --------------------
+@receiver(post_save, sender=AdoptedArea)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=AdoptedArea)
+@receiver(post_delete, sender=Team)
+@receiver(adopted_areas_bulk_changed)
+def schedule_snapshot_rebuild(sender, **kwargs):
+    transaction.on_commit(snapshots.schedule_rebuild)
+
+
+# -------------------- Change versions and tombstones --------------------
+# AdoptedArea.save and the bulk writers take the adopted_area version themselves and
+# store it as the row revision; deletes have no row left to carry it.
+@receiver(post_delete, sender=AdoptedArea)
+def record_deleted_adoption(sender, instance, **kwargs):
+    # Kept on the instance for the live event.
+    instance.revision = versions.bump(versions.ADOPTED_AREAS)
+    sync.record_tombstones([instance.pk], instance.revision, "deleted")
+
+
+@receiver(post_save, sender=AdoptedArea)
+def record_deactivated_adoption(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if previous and previous["is_active"] and not instance.is_active:
+        sync.record_tombstones([instance.pk], instance.revision, "deactivated")
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def bump_team_version(sender, **kwargs):
+    versions.bump(versions.TEAMS)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@receiver(m2m_changed, sender=Team.leaders.through)
+def bump_team_version_on_membership(sender, action, **kwargs):
+    # Team responses list member and leader ids.
+    if action.startswith("post_"):
+        versions.bump(versions.TEAMS)
+
+
+# -------------------- Live events --------------------
+@receiver(post_save, sender=AdoptedArea)
+def publish_saved_adoption(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    previous_location = previous and previous["location"]
+    if instance.is_active:
+        event = events.area_event("created" if created else "updated", instance, previous_location)
+    elif previous and previous["is_active"]:
+        event = events.area_event("removed", instance, previous_location)
+    else:
+        return
+    transaction.on_commit(lambda: events.hub.publish([event]))
+
+
+@receiver(post_delete, sender=AdoptedArea)
+def publish_deleted_adoption(sender, instance, **kwargs):
+    event = events.area_event("removed", instance)
+    transaction.on_commit(lambda: events.hub.publish([event]))
+
+
+@receiver(adopted_areas_bulk_changed)
+def publish_bulk_changed_adoptions(sender, areas, action, **kwargs):
+    batch = events.area_events("removed" if action == "deactivate" else "created", areas)
+    transaction.on_commit(lambda: events.hub.publish(batch))
+
+
+# -------------------- Adoption statistics --------------------
+@receiver(post_save, sender=AdoptedArea)
+def count_saved_adoption(sender, instance, **kwargs):
+    stats.record_change(before=getattr(instance, "_previous", None), after=instance)
+
+
+@receiver(post_delete, sender=AdoptedArea)
+def count_deleted_adoption(sender, instance, **kwargs):
+    stats.record_change(before=instance)
+
+
+@receiver(adopted_areas_bulk_changed)
+def count_bulk_changed_adoptions(sender, areas, action, updated_at=None, **kwargs):
+    deltas = Counter()
+    for area in areas:
+        if action == "deactivate":
+            # ``area`` holds the values read before the update, so is_active is still True.
+            deltas[stats.stat_key(area)] -= 1
+            after = {field: getattr(area, field) for field in stats.STAT_FIELDS}
+            deltas[stats.stat_key({**after, "is_active": False, "updated_at": updated_at})] += 1
+        else:
+            deltas[stats.stat_key(area)] += 1
+    stats.apply_deltas(deltas)
+
+
+# -------------------- Session token cache --------------------
+@receiver(user_logged_out)
+def forget_logged_out_token(sender, request, user, **kwargs):
+    session_key = getattr(getattr(request, "session", None), "session_key", None)
+    if session_key:
+        token_cache.invalidate_token(session_key)
+
+
+@receiver(post_delete, sender=Session)
+def forget_deleted_session_token(sender, instance, **kwargs):
+    token_cache.invalidate_token(instance.session_key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user_tokens(sender, instance, **kwargs):
+    # Covers deactivation as well as any other change to the cached user object.
+    token_cache.invalidate_user(instance.pk)
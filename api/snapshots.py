@@ -0,0 +1,177 @@
+"""Pre-rendered GeoJSON snapshots of the public map layers.
+
+Each build writes one file per layer under LAYER_SNAPSHOT_ROOT, named after a hash of
+its content, next to ``.gz`` and ``.br`` variants. SnapshotWhiteNoiseMiddleware serves
+them with immutable cache headers. ``manifest.json`` is replaced last and names the
+current files, so a reader never sees a half-written version. Builds in different
+processes take turns on a PostgreSQL advisory lock.
+"""
+import contextlib
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.utils.timezone import now
+
+from .geojson import STREAM_CHUNK_SIZE, TEAM_PROPERTIES, layer_rows, stream_feature_collection, team_feature_rows
+from .models import AdoptedArea, Team
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+REBUILD_PENDING_KEY = "snapshots:rebuild-pending"
+# pg_advisory_lock key held while building; any constant unique to this use.
+BUILD_LOCK_KEY = 0x736E6170
+# Quality 11 is several times slower on large layers for a few percent smaller files.
+BROTLI_QUALITY = 9
+
+
+def adopted_area_chunks():
+    rows = layer_rows(AdoptedArea.objects.active()).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    return stream_feature_collection(rows)
+
+
+def team_chunks():
+    rows = team_feature_rows(Team.objects.all()).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    return stream_feature_collection(rows, property_names=TEAM_PROPERTIES)
+
+
+LAYERS = {"adopted-areas": adopted_area_chunks, "teams": team_chunks}
+
+
+def write_snapshot(root, name, chunks):
+    """Write one layer and its compressed variants in a single pass; returns the file name."""
+    digest = hashlib.sha256()
+    temp_paths = {suffix: tempfile.mkstemp(dir=root, prefix=f".{name}-", suffix=suffix + ".tmp") for suffix in ("", ".gz", ".br")}
+    outputs = {suffix: os.fdopen(fd, "wb") for suffix, (fd, _) in temp_paths.items()}
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY) if brotli else None
+    try:
+        with gzip.GzipFile(fileobj=outputs[".gz"], mode="wb", compresslevel=9, mtime=0) as gz:
+            for chunk in chunks:
+                data = chunk.encode()
+                digest.update(data)
+                outputs[""].write(data)
+                gz.write(data)
+                if compressor:
+                    outputs[".br"].write(compressor.process(data))
+        if compressor:
+            outputs[".br"].write(compressor.finish())
+    finally:
+        for output in outputs.values():
+            output.close()
+
+    filename = f"{name}.{digest.hexdigest()[:16]}.geojson"
+    path = os.path.join(root, filename)
+    # The uncompressed file goes last: WhiteNoise only serves variants of a file that exists.
+    for suffix in (".gz", ".br", ""):
+        temp_path = temp_paths[suffix][1]
+        if suffix == ".br" and not compressor:
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path + suffix)
+    return filename
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(settings.LAYER_SNAPSHOT_ROOT, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(root, manifest):
+    fd, temp_path = tempfile.mkstemp(dir=root, prefix=".manifest-", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, os.path.join(root, MANIFEST_NAME))
+
+
+def prune(root, current, keep):
+    """Delete all but the ``keep`` newest versions of each layer, never the current one."""
+    for name in LAYERS:
+        versions = sorted(
+            (entry for entry in os.scandir(root) if entry.name.startswith(f"{name}.") and entry.name.endswith(".geojson")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in versions[keep:]:
+            if entry.name in current:
+                continue
+            for suffix in ("", ".gz", ".br"):
+                try:
+                    os.remove(entry.path + suffix)
+                except FileNotFoundError:
+                    pass
+
+
+@contextlib.contextmanager
+def build_lock():
+    """Wait for any other process's build, so manifests and pruning never interleave."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [BUILD_LOCK_KEY])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [BUILD_LOCK_KEY])
+
+
+def build_snapshots():
+    """Render every layer and point the manifest at the new files; returns the manifest."""
+    root = settings.LAYER_SNAPSHOT_ROOT
+    os.makedirs(root, exist_ok=True)
+    with build_lock():
+        files = {name: write_snapshot(root, name, chunks()) for name, chunks in LAYERS.items()}
+        manifest = {
+            "version": hashlib.sha256("".join(sorted(files.values())).encode()).hexdigest()[:16],
+            "generated_at": now().isoformat(),
+            "layers": {name: settings.LAYER_SNAPSHOT_URL + filename for name, filename in files.items()},
+        }
+        write_manifest(root, manifest)
+        prune(root, set(files.values()), settings.LAYER_SNAPSHOT_KEEP)
+    logger.info("Built layer snapshot %s.", manifest["version"])
+    return manifest
+
+
+def _build_in_thread():
+    try:
+        build_snapshots()
+    except Exception:
+        logger.exception("Layer snapshot rebuild failed")
+    finally:
+        connections.close_all()
+
+
+def schedule_rebuild():
+    """Queue one rebuild LAYER_SNAPSHOT_DEBOUNCE_S from now, unless one is already queued.
+
+    Every write calls this, so a burst of writes inside the window costs one rebuild,
+    which runs after the window and so sees all of them. The pending flag lives in the
+    shared cache, so the window holds across every worker process.
+    """
+    delay = settings.LAYER_SNAPSHOT_DEBOUNCE_S
+    if not delay or not cache.add(REBUILD_PENDING_KEY, True, delay):
+        return False
+    if settings.CELERY_TASK_ALWAYS_EAGER:
+        # Eager Celery ignores countdown, so wait on a timer thread instead.
+        timer = threading.Timer(delay, _build_in_thread)
+        timer.daemon = True
+        timer.start()
+    else:
+        from .tasks import rebuild_layer_snapshots
+
+        rebuild_layer_snapshots.apply_async(countdown=delay)
+    return True
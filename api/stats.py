@@ -0,0 +1,131 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, Count, Q, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils.timezone import localdate
+
+from .models import AdoptedArea, AdoptionStat
+
+# Columns of AdoptedArea that an AdoptionStat group is derived from.
+STAT_FIELDS = ("country", "state", "city", "adoption_type", "is_active", "end_date", "updated_at")
+# Columns of AdoptionStat that identify a group, in table order.
+GROUP_FIELDS = ("country", "state", "city", "adoption_type", "is_active", "expired")
+
+# An adoption is counted as expired when it was switched off after its end date had
+# passed, by api.expiry or by hand. This reads stored columns only, never today's date,
+# so a row always moves out of the same group it was counted in.
+EXPIRED = Q(is_active=False, adoption_type="temporary", end_date__isnull=False, end_date__lt=TruncDate("updated_at"))
+
+UPSERT_SQL = f"""
+INSERT INTO {AdoptionStat._meta.db_table} ({", ".join(GROUP_FIELDS)}, count)
+VALUES %s
+ON CONFLICT ({", ".join(GROUP_FIELDS)})
+DO UPDATE SET count = {AdoptionStat._meta.db_table}.count + EXCLUDED.count
+"""
+ROW_PLACEHOLDER = f"({', '.join(['%s'] * (len(GROUP_FIELDS) + 1))})"
+
+
+def is_expired(values):
+    """Python form of EXPIRED for a dict of STAT_FIELDS values."""
+    return bool(
+        not values["is_active"]
+        and values["adoption_type"] == "temporary"
+        and values["end_date"] is not None
+        and values["updated_at"] is not None
+        and values["end_date"] < localdate(values["updated_at"])
+    )
+
+
+def stat_key(values):
+    """Group key of an AdoptedArea instance or of a dict of its STAT_FIELDS values."""
+    if not isinstance(values, dict):
+        values = {field: getattr(values, field) for field in STAT_FIELDS}
+    return (*(values[field] for field in GROUP_FIELDS[:-1]), is_expired(values))
+
+
+def group_key(row):
+    """Group key of a ``.values(*GROUP_FIELDS)`` row."""
+    return tuple(row[field] for field in GROUP_FIELDS)
+
+
+def apply_deltas(deltas):
+    """Add ``{group key: delta}`` to the rollup in one upsert statement.
+
+    Call inside the transaction that made the change so the rollup commits with it.
+    """
+    rows = sorted((key, delta) for key, delta in deltas.items() if delta)
+    if not rows:
+        return
+    placeholders = ", ".join([ROW_PLACEHOLDER] * len(rows))
+    params = [value for key, delta in rows for value in (*key, delta)]
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL % placeholders, params)
+
+
+def record_change(before=None, after=None):
+    """Move one adoption from the ``before`` group to the ``after`` group."""
+    deltas = Counter()
+    if before is not None:
+        deltas[stat_key(before)] -= 1
+    if after is not None:
+        deltas[stat_key(after)] += 1
+    apply_deltas(deltas)
+
+
+def reconcile():
+    """Rebuild the rollup from AdoptedArea; returns how many groups had drifted."""
+    with transaction.atomic():
+        # Writers block on their rollup upsert until we commit, so none can slip between
+        # the recount below and the replacement of the table.
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {AdoptionStat._meta.db_table} IN SHARE ROW EXCLUSIVE MODE")
+
+        actual = {
+            group_key(row): row["n"]
+            for row in AdoptedArea.objects.order_by()
+            .annotate(expired=Case(When(EXPIRED, then=True), default=False, output_field=BooleanField()))
+            .values(*GROUP_FIELDS)
+            .annotate(n=Count("id"))
+        }
+        stored = {
+            group_key(row): row["count"]
+            for row in AdoptionStat.objects.filter(count__gt=0).values(*GROUP_FIELDS, "count")
+        }
+        drifted = sum(1 for key in actual.keys() | stored.keys() if actual.get(key, 0) != stored.get(key, 0))
+
+        AdoptionStat.objects.all().delete()
+        AdoptionStat.objects.bulk_create(
+            [AdoptionStat(**dict(zip(GROUP_FIELDS, key)), count=count) for key, count in actual.items()],
+            batch_size=5000,
+        )
+    return drifted
+
+
+def grouped_stats(group_by, adoption_type=None):
+    """Active/inactive counts per place and adoption type, plus overall totals.
+
+    Reads only the rollup, so the cost follows the number of groups, not adoptions.
+    Totals split inactive adoptions into ``expired`` (see EXPIRED) and ``deactivated``.
+    Adoptions past their end date count as active until api.expiry switches them off.
+    """
+    place_fields = ("country", "state", "city")[: ("country", "state", "city").index(group_by) + 1]
+    stats = AdoptionStat.objects.filter(count__gt=0)
+    if adoption_type:
+        stats = stats.filter(adoption_type=adoption_type)
+
+    groups = list(
+        stats.order_by(*place_fields, "adoption_type")
+        .values(*place_fields, "adoption_type")
+        .annotate(
+            active=Sum("count", filter=Q(is_active=True), default=0),
+            inactive=Sum("count", filter=Q(is_active=False), default=0),
+        )
+    )
+    totals = stats.aggregate(
+        active=Sum("count", filter=Q(is_active=True), default=0),
+        inactive=Sum("count", filter=Q(is_active=False), default=0),
+        expired=Sum("count", filter=Q(is_active=False, expired=True), default=0),
+        deactivated=Sum("count", filter=Q(is_active=False, expired=False), default=0),
+    )
+    return totals, groups
@@ -0,0 +1,107 @@
+"""Delta sync for the adopted area layer.
+
+Every write to an adoption takes the next ``adopted_area`` ChangeVersion inside its
+transaction and stores it as the row's ``revision``. Adoptions that leave the layer also
+get an AdoptedAreaTombstone. A sync token is simply a revision, so "what changed since
+token N" is two index range scans on ``revision``. The cost follows the number of
+changes, not the size of the layer.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from .geojson import layer_item, layer_values
+from .models import AdoptedArea, AdoptedAreaTombstone, ChangeVersion
+
+# Past this many changes a client is told to reload the layer instead.
+MAX_SYNC_CHANGES = 10000
+
+
+def encode_token(revision):
+    return str(revision)
+
+
+def decode_token(token):
+    try:
+        revision = int(token)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid sync token.")
+    if revision < 0:
+        raise ValueError("Invalid sync token.")
+    return revision
+
+
+def current_revision():
+    return ChangeVersion.objects.filter(name=ChangeVersion.ADOPTED_AREAS).values_list("version", flat=True).first() or 0
+
+
+def record_tombstones(area_ids, revision, reason):
+    AdoptedAreaTombstone.objects.bulk_create(
+        [AdoptedAreaTombstone(area_id=area_id, revision=revision, reason=reason) for area_id in area_ids]
+    )
+
+
+def _reset(revision):
+    return {"token": encode_token(revision), "reset": True, "upserts": [], "removed": []}
+
+
+def changes_since(since):
+    """Adoptions added or changed after revision ``since`` and ids of those that left the layer.
+
+    ``reset`` is set instead when the client is too far behind: tombstones it needs
+    were pruned, or there are more than MAX_SYNC_CHANGES changes.
+
+    Temporary adoptions leave the layer at midnight, before api.expiry gives them a
+    revision and a tombstone, so until then they are listed as removed on every sync.
+    """
+    # Read the head first; anything committed later has a higher revision and waits for the next sync.
+    head = current_revision()
+    floor = ChangeVersion.objects.filter(name=ChangeVersion.TOMBSTONE_FLOOR).values_list("version", flat=True).first() or 0
+    if since < floor or since > head:
+        return _reset(head)
+
+    window = {"revision__gt": since, "revision__lte": head}
+    upserts = list(
+        layer_values(AdoptedArea.objects.active().filter(**window)).order_by("revision", "id")[: MAX_SYNC_CHANGES + 1]
+    )
+    removed = list(
+        AdoptedAreaTombstone.objects.filter(**window)
+        .order_by("revision")
+        .values_list("area_id", flat=True)[: MAX_SYNC_CHANGES + 1]
+    )
+    past_end = list(
+        AdoptedArea.objects.expired().filter(revision__lte=head).values_list("id", flat=True)[: MAX_SYNC_CHANGES + 1]
+    )
+    if len(upserts) > MAX_SYNC_CHANGES or len(removed) + len(past_end) > MAX_SYNC_CHANGES:
+        return _reset(head)
+
+    # An adoption switched off and back on again is simply current.
+    present = {row["id"] for row in upserts}
+    return {
+        "token": encode_token(head),
+        "reset": False,
+        "upserts": [layer_item(row) for row in upserts],
+        "removed": sorted({area_id for area_id in removed if area_id not in present}.union(past_end)),
+    }
+
+
+def prune_tombstones():
+    """Delete tombstones older than ADOPTION_TOMBSTONE_RETENTION_DAYS; returns how many went."""
+    cutoff = now() - timedelta(days=settings.ADOPTION_TOMBSTONE_RETENTION_DAYS)
+    with transaction.atomic():
+        old = AdoptedAreaTombstone.objects.filter(created_at__lt=cutoff)
+        highest = old.aggregate(highest=Max("revision"))["highest"]
+        if highest is None:
+            return 0
+        deleted, _ = AdoptedAreaTombstone.objects.filter(revision__lte=highest).delete()
+        floor, _ = ChangeVersion.objects.get_or_create(
+            name=ChangeVersion.TOMBSTONE_FLOOR, defaults={"version": 0, "changed_at": now()}
+        )
+        if highest > floor.version:
+            floor.version = highest
+            floor.changed_at = now()
+            floor.save(update_fields=["version", "changed_at"])
+    return deleted
@@ -0,0 +1,157 @@
+"""Deterministic synthetic data for load and scale testing, see ``generate_synthetic_data``.
+
+Adoptions are drawn around beach "hotspots" placed along rough coastline polylines.
+Hotspot popularity and volunteer activity follow heavy-tailed distributions, so a few
+beaches and users hold a large share of the rows, as they do in real data. Everything
+is drawn from one NumPy Generator seeded by the caller. Dates are drawn relative to
+the day the data is generated.
+"""
+import csv
+import datetime
+import io
+
+import numpy as np
+from django.db import connection
+
+from .adoption_io import COPY_COLUMNS
+from .models import AdoptedArea
+
+# (country, state, coastline vertices as (lng, lat)); coarse, but on the right coasts.
+COASTLINES = [
+    ("USA", "Washington", [(-124.7, 48.4), (-124.0, 46.3)]),
+    ("USA", "Oregon", [(-123.9, 46.2), (-124.1, 44.0), (-124.5, 42.0)]),
+    ("USA", "California", [
+        (-124.2, 41.99), (-123.8, 39.8), (-122.5, 37.8), (-121.9, 36.6),
+        (-120.6, 34.6), (-118.5, 34.0), (-117.1, 32.5),
+    ]),
+    ("USA", "Texas", [(-97.2, 25.9), (-97.4, 27.8), (-95.0, 29.3), (-93.8, 29.7)]),
+    ("USA", "Florida", [
+        (-87.6, 30.3), (-84.3, 30.0), (-82.8, 27.9), (-81.8, 26.1),
+        (-80.4, 25.2), (-80.1, 26.7), (-81.4, 30.7),
+    ]),
+    ("USA", "North Carolina", [(-78.5, 33.9), (-76.5, 34.7), (-75.5, 35.3), (-75.9, 36.5)]),
+    ("USA", "Massachusetts", [(-70.9, 42.8), (-70.6, 42.0), (-70.0, 41.7), (-70.9, 41.5)]),
+    ("Mexico", "Baja California", [(-117.1, 32.5), (-116.6, 31.5), (-115.9, 30.3), (-114.7, 28.0)]),
+    ("Brazil", "Rio de Janeiro", [(-44.3, -23.0), (-43.2, -23.0), (-42.0, -22.9)]),
+    ("United Kingdom", "Cornwall", [(-5.7, 50.1), (-4.7, 50.3), (-4.2, 50.4)]),
+    ("Portugal", "Algarve", [(-8.99, 37.0), (-8.0, 37.0), (-7.4, 37.2)]),
+    ("Spain", "Catalonia", [(3.2, 42.4), (2.2, 41.4), (0.9, 41.0)]),
+    ("South Africa", "Western Cape", [(18.3, -33.9), (18.5, -34.4), (19.4, -34.6), (22.1, -34.1)]),
+    ("Japan", "Kanagawa", [(139.1, 35.2), (139.5, 35.3), (139.8, 35.2)]),
+    ("Philippines", "Cebu", [(123.3, 10.3), (123.9, 10.3), (124.0, 11.2)]),
+    ("Australia", "New South Wales", [(153.6, -28.2), (153.0, -31.0), (151.3, -33.9), (150.2, -35.7), (150.0, -37.5)]),
+]
+
+TEMPORARY_SHARE = 0.15
+INACTIVE_SHARE = 0.05
+HISTORY_DAYS = 3 * 365
+
+
+def heavy_tailed_weights(rng, size, shape=1.2):
+    """Pareto-distributed probabilities: a few entries take most of the mass."""
+    weights = rng.pareto(shape, size) + 1
+    return weights / weights.sum()
+
+
+class Hotspots:
+    """Beach locations along COASTLINES, each with a popularity and a spread in degrees."""
+
+    def __init__(self, rng, count):
+        starts, ends, regions = [], [], []
+        for region, (_, _, vertices) in enumerate(COASTLINES):
+            for a, b in zip(vertices, vertices[1:]):
+                starts.append(a)
+                ends.append(b)
+                regions.append(region)
+        starts, ends = np.array(starts), np.array(ends)
+        # Segment lengths with longitude shrunk by latitude, so coasts get hotspots by size.
+        mid_lat = np.radians((starts[:, 1] + ends[:, 1]) / 2)
+        delta = ends - starts
+        lengths = np.hypot(delta[:, 0] * np.cos(mid_lat), delta[:, 1])
+
+        segment = rng.choice(len(lengths), size=count, p=lengths / lengths.sum())
+        t = rng.random(count)[:, None]
+        points = starts[segment] + t * delta[segment]
+        self.lng = points[:, 0]
+        self.lat = points[:, 1]
+        self.region = np.array(regions)[segment]
+        self.weights = heavy_tailed_weights(rng, count)
+        # Roughly 300 m to 3 km.
+        self.spread = rng.uniform(0.003, 0.03, count)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def sample_points(self, rng, size):
+        """``(hotspot index, lng, lat)`` arrays for ``size`` points around popular hotspots."""
+        hotspot = rng.choice(len(self), size=size, p=self.weights)
+        spread = self.spread[hotspot]
+        lat = np.clip(self.lat[hotspot] + rng.normal(0, 1, size) * spread, -89.9, 89.9)
+        lng = self.lng[hotspot] + rng.normal(0, 1, size) * spread / np.cos(np.radians(lat))
+        return hotspot, (lng + 180) % 360 - 180, lat
+
+    def place(self, hotspot):
+        country, state, _ = COASTLINES[self.region[hotspot]]
+        return country, state, f"Beach {hotspot}"
+
+
+def team_sizes(rng, count, user_count, huge=0, huge_share=0.1):
+    """Member counts: log-normal (median about 7) with ``huge`` teams of ``huge_share`` of all users."""
+    sizes = np.ceil(rng.lognormal(mean=2.0, sigma=1.0, size=count)).astype(int)
+    sizes[:huge] = max(1, int(user_count * huge_share))
+    return np.clip(sizes, 1, user_count)
+
+
+def leader_counts(rng, sizes):
+    """One to five leaders per team, never more than its members."""
+    return np.minimum(1 + np.minimum(rng.poisson(0.5, len(sizes)), 4), sizes)
+
+
+def adoption_rows(rng, hotspots, owners, first_index, size, today, now):
+    """One chunk of ``size`` adoptions as COPY_COLUMNS tuples.
+
+    ``owners`` is a ``(user ids, emails, names, weights)`` tuple of NumPy arrays.
+    """
+    user_ids, emails, names, weights = owners
+    owner = rng.choice(len(user_ids), size=size, p=weights)
+    hotspot, lng, lat = hotspots.sample_points(rng, size)
+    temporary = rng.random(size) < TEMPORARY_SHARE
+    # Some temporary adoptions are already past their end date, for the expiry engine.
+    end_offsets = rng.integers(-60, 365, size)
+    active = rng.random(size) >= INACTIVE_SHARE
+    created_offsets = rng.uniform(0, HISTORY_DAYS * 86400, size)
+
+    rows = []
+    for i in range(size):
+        country, state, city = hotspots.place(hotspot[i])
+        created_at = (now - datetime.timedelta(seconds=float(created_offsets[i]))).isoformat()
+        rows.append((
+            int(user_ids[owner[i]]),
+            f"Synthetic spot {first_index + i}",
+            names[owner[i]],
+            emails[owner[i]],
+            "temporary" if temporary[i] else "indefinite",
+            (today + datetime.timedelta(days=int(end_offsets[i]))).isoformat() if temporary[i] else r"\N",
+            bool(active[i]),
+            "",
+            f"SRID=4326;POINT({lng[i]:.7f} {lat[i]:.7f})",
+            city,
+            state,
+            country,
+            created_at,
+            created_at,
+        ))
+    return rows
+
+
+def copy_adoption_rows(rows, revision):
+    """COPY rows from ``adoption_rows`` into the AdoptedArea table with ``revision``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(row + (revision,) for row in rows)
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f"COPY {AdoptedArea._meta.db_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
@@ -0,0 +1,27 @@
+from celery import shared_task
+
+from . import expiry, snapshots, stats, sync
+
+
+@shared_task
+def expire_adoptions():
+    """Scheduled by CELERY_BEAT_SCHEDULE; runs inline when no broker is configured."""
+    chunks = expiry.expire_adoptions()
+    return {"rows": sum(chunk["rows"] for chunk in chunks), "chunks": chunks}
+
+
+@shared_task
+def rebuild_layer_snapshots():
+    """Queued by snapshots.schedule_rebuild after a burst of writes."""
+    return snapshots.build_snapshots()["version"]
+
+
+@shared_task
+def prune_tombstones():
+    return sync.prune_tombstones()
+
+
+@shared_task
+def reconcile_adoption_stats():
+    """Scheduled by CELERY_BEAT_SCHEDULE; returns how many groups had drifted."""
+    return stats.reconcile()
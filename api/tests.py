@@ -1,3 +1,532 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import localdate
+
+from . import events, expiry, metrics, replicas, stats, sync, tiles
+from .auth import get_user_from_token, token_cache
+from .models import AdoptedArea, AdoptedAreaTombstone, Team
+from .pagination import decode_cursor, encode_cursor
+from .proximity import locked_spacing_conflict
+
+User = get_user_model()
+
+
+class ListTeamsQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="pw")
+            for i in range(3)
+        ]
+
+    def create_teams(self, count):
+        for i in range(count):
+            team = Team.objects.create(name=f"Team {i}", headquarters=Point(-122.0 + i * 0.01, 36.9, srid=4326))
+            team.members.add(*self.users)
+            team.leaders.add(self.users[0])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_query_count_does_not_grow_with_teams(self):
+        for url in ("/api/teams/", "/api/teams/?include=counts"):
+            with self.subTest(url=url):
+                Team.objects.all().delete()
+                self.create_teams(2)
+                few, _ = self.count_queries(url)
+                self.create_teams(20)
+                many, teams = self.count_queries(url)
+                self.assertEqual(len(teams), 22)
+                self.assertEqual(few, many)
+
+    def test_ids_and_counts(self):
+        self.create_teams(1)
+        _, (team,) = self.count_queries("/api/teams/")
+        self.assertEqual(team["member_ids"], sorted(user.pk for user in self.users))
+        self.assertEqual(team["leader_ids"], [self.users[0].pk])
+        self.assertEqual(team["headquarters"], {"type": "Point", "coordinates": [-122.0, 36.9]})
+
+        _, (team,) = self.count_queries("/api/teams/?include=counts")
+        self.assertEqual((team["member_count"], team["leader_count"]), (3, 1))
+        self.assertNotIn("member_ids", team)
+
+
+def create_areas(user, count, **fields):
+    return [
+        AdoptedArea.objects.create(**{
+            "user": user, "area_name": f"Spot {i}", "adoptee_name": "Owner", "email": user.email,
+            "location": Point(-122.0 + i * 0.01, 36.9, srid=4326), "city": "Santa Cruz", "state": "CA", "country": "USA",
+            **fields,
+        })
+        for i in range(count)
+    ]
+
+
+class LayerPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        cls.areas = create_areas(cls.user, 5)
+
+    def pages(self, limit):
+        ids, cursor = [], None
+        while True:
+            url = f"/api/adopted-area-layer/?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item["id"] for item in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return ids
+
+    def test_cursor_round_trip(self):
+        created_at, pk = decode_cursor(encode_cursor(self.areas[0].created_at, self.areas[0].pk))
+        self.assertEqual((created_at, pk), (self.areas[0].created_at, self.areas[0].pk))
+        self.assertEqual(self.pages(2), [area.pk for area in self.areas])
+
+    def test_equal_created_at_is_ordered_by_id(self):
+        AdoptedArea.objects.update(created_at=self.areas[0].created_at)
+        self.assertEqual(self.pages(2), sorted(area.pk for area in self.areas))
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-a-cursor", encode_cursor(self.areas[0].created_at, self.areas[0].pk)[:-4]):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f"/api/adopted-area-layer/?cursor={cursor}").status_code, 400)
+
+
+class DeltaSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        cls.areas = create_areas(cls.user, 2)
+
+    def changes(self, since):
+        response = self.client.get(f"/api/adopted-area-layer/changes/?since={since}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_token_ahead_of_head_resets(self):
+        head = sync.current_revision()
+        changes = self.changes(head + 5)
+        self.assertTrue(changes["reset"])
+        self.assertEqual(changes["token"], sync.encode_token(head))
+
+    def test_deactivation_leaves_a_tombstone(self):
+        token = sync.encode_token(sync.current_revision())
+        removed, updated = self.areas
+        removed.is_active = False
+        removed.save()
+        updated.note = "Cleaned on Saturday"
+        updated.save()
+
+        self.assertTrue(AdoptedAreaTombstone.objects.filter(area_id=removed.pk, reason="deactivated").exists())
+        changes = self.changes(token)
+        self.assertFalse(changes["reset"])
+        self.assertEqual(changes["removed"], [removed.pk])
+        self.assertEqual([item["id"] for item in changes["upserts"]], [updated.pk])
+        self.assertEqual(changes["token"], sync.encode_token(sync.current_revision()))
+
+    def test_past_end_date_is_removed_before_expiry_runs(self):
+        yesterday = localdate() - datetime.timedelta(days=1)
+        ended, = create_areas(self.user, 1, adoption_type="temporary", end_date=yesterday)
+        token = sync.encode_token(sync.current_revision())
+
+        changes = self.changes(token)
+        self.assertFalse(changes["reset"])
+        self.assertEqual(changes["removed"], [ended.pk])
+        self.assertEqual(changes["upserts"], [])
+
+
+class ConditionalGetTests(TestCase):
+    LAYER = "/api/adopted-area-layer/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        create_areas(cls.user, 2)
+        cls.team = Team.objects.create(name="Beach crew", headquarters=Point(-122.0, 36.9, srid=4326))
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.client.get(self.LAYER)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        not_modified = self.client.get(self.LAYER, headers={"If-None-Match": etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers["ETag"], etag)
+        self.assertEqual(not_modified.content, b"")
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.LAYER).headers["Last-Modified"]
+        response = self.client.get(self.LAYER, headers={"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get(self.LAYER).headers["ETag"]
+        create_areas(self.user, 1, location=Point(-121.0, 36.9, srid=4326))
+        response = self.client.get(self.LAYER, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_query_string_is_part_of_the_etag(self):
+        etag = self.client.get(self.LAYER).headers["ETag"]
+        self.assertNotEqual(self.client.get(f"{self.LAYER}?limit=1").headers["ETag"], etag)
+
+    def test_layer_changes_at_midnight(self):
+        first = self.client.get(self.LAYER)
+        tomorrow = localdate() + datetime.timedelta(days=1)
+        with mock.patch("api.versions.localdate", return_value=tomorrow):
+            response = self.client.get(self.LAYER, headers={"If-None-Match": first.headers["ETag"]})
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(self.LAYER, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+            self.assertEqual(response.status_code, 200)
+
+    def test_team_membership_changes_the_etag(self):
+        etag = self.client.get("/api/teams/").headers["ETag"]
+        self.team.members.add(self.user)
+        response = self.client.get("/api/teams/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(self.client.get("/api/teams/", headers={"If-None-Match": response.headers["ETag"]}).status_code, 304)
+
+
+class NearbyAdoptedAreasTests(TestCase):
+    def test_nearest_first(self):
+        user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        areas = create_areas(user, 4)
+        # East of every area, so the last one created is the closest.
+        response = self.client.get("/api/adopted-areas/nearby/?lng=-121.965&lat=36.9&radius_m=5000")
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual([row["id"] for row in rows], [area.pk for area in reversed(areas)])
+        distances = [row["distance_m"] for row in rows]
+        self.assertEqual(distances, sorted(distances))
+
+
+class SpacingRaceTests(TransactionTestCase):
+    def test_second_adopt_waits_for_the_first_to_commit(self):
+        user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        first_saved, commit_first = threading.Event(), threading.Event()
+        conflicts = {}
+
+        def adopt(name, lng, wait_for=None, hold=None):
+            try:
+                if wait_for:
+                    wait_for.wait(5)
+                with transaction.atomic():
+                    conflicts[name] = locked_spacing_conflict(lng, 36.9)
+                    if not conflicts[name]:
+                        create_areas(user, 1, location=Point(lng, 36.9, srid=4326))
+                    if hold:
+                        first_saved.set()
+                        hold.wait(5)
+            finally:
+                connection.close()
+
+        first = threading.Thread(target=adopt, args=("first", -122.0), kwargs={"hold": commit_first})
+        # 0.0001 degrees is about 9 m, inside the default 25 m spacing.
+        second = threading.Thread(target=adopt, args=("second", -122.0001), kwargs={"wait_for": first_saved})
+        first.start()
+        second.start()
+        # The second transaction is now blocked on the first one's cell lock.
+        second.join(0.5)
+        self.assertTrue(second.is_alive())
+        commit_first.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertIsNone(conflicts["first"])
+        self.assertEqual(conflicts["second"], AdoptedArea.objects.get().id)
+
+
+class SearchTests(TestCase):
+    def test_type_limits_the_results(self):
+        user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        create_areas(user, 1, area_name="Seabright Beach")
+        Team.objects.create(name="Seabright Stewards", headquarters=Point(-122.0, 36.96, srid=4326))
+
+        both = self.client.get("/api/search/?q=seabright").json()
+        self.assertEqual((len(both["areas"]), len(both["teams"])), (1, 1))
+        teams = self.client.get("/api/search/?q=seabright&type=teams").json()
+        self.assertEqual((len(teams["areas"]), len(teams["teams"])), (0, 1))
+
+
+class TileCacheTests(TestCase):
+    def test_write_only_drops_tiles_holding_the_point(self):
+        z = 10
+        near = tiles.tile_for_point(-122.0, 36.9, z)
+        far = tiles.tile_for_point(139.5, 35.3, z)
+        for x, y in (near, far):
+            tiles.get_tile(z, x, y)
+
+        user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            create_areas(user, 1)
+        self.assertIsNone(cache.get(tiles.tile_cache_key(z, *near)))
+        self.assertIsNotNone(cache.get(tiles.tile_cache_key(z, *far)))
+
+
+class SessionTokenCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        self.client.force_login(self.user)
+        self.token = self.client.session.session_key
+        self.assertEqual(get_user_from_token(self.token), self.user)
+
+    def test_hit_costs_no_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_from_token(self.token), self.user)
+
+    def test_logout_forgets_the_token(self):
+        self.client.logout()
+        self.assertIsNone(get_user_from_token(self.token))
+
+    def test_deleted_session_forgets_the_token(self):
+        Session.objects.filter(session_key=self.token).delete()
+        self.assertIsNone(get_user_from_token(self.token))
+
+    def test_deactivated_user_forgets_every_token(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(get_user_from_token(self.token))
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("api.replicas.replica_aliases", return_value=["replica_0"])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        router = replicas.ReplicaRouter()
+
+        def aliases(request):
+            return router.db_for_read(AdoptedArea), router.db_for_write(AdoptedArea)
+
+        async def async_aliases(request):
+            return aliases(request)
+
+        self.view = replicas.read_replica(aliases)
+        self.async_view = replicas.read_replica(async_aliases)
+        self.router = router
+
+    def request(self, token):
+        return RequestFactory().get("/api/teams/", headers={"X-Session-Token": token})
+
+    def test_unpinned_reads_use_a_replica(self):
+        self.assertEqual(self.view(self.request("reader")), ("replica_0", "default"))
+        self.assertEqual(async_to_sync(self.async_view)(self.request("reader")), ("replica_0", "default"))
+
+    def test_pinned_reads_use_the_primary(self):
+        replicas.pin("writer")
+        self.assertEqual(self.view(self.request("writer")), (None, "default"))
+        self.assertEqual(async_to_sync(self.async_view)(self.request("writer")), (None, "default"))
+        self.assertEqual(self.view(self.request("reader")), ("replica_0", "default"))
+
+    def test_apin_pins_like_pin(self):
+        async_to_sync(replicas.apin)("writer")
+        self.assertEqual(async_to_sync(self.async_view)(self.request("writer")), (None, "default"))
+
+    def test_reads_outside_a_wrapped_view_use_the_primary(self):
+        self.view(self.request("reader"))
+        self.assertIsNone(self.router.db_for_read(AdoptedArea))
+
+
+class BenchmarkBulkAdoptCommandTests(TestCase):
+    def test_runs_both_passes_and_leaves_no_rows(self):
+        out = StringIO()
+        call_command("benchmark_bulk_adopt", items=20, stdout=out)
+        self.assertIn("20 single requests", out.getvalue())
+        self.assertIn("1 bulk request", out.getvalue())
+        self.assertFalse(AdoptedArea.objects.exists())
+
+
+class StreamAdoptedAreasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        AdoptedArea.objects.bulk_create(
+            AdoptedArea(
+                user=user, area_name=f"Spot {i}", adoptee_name="Owner", email=user.email,
+                location=Point(-122.0 + i * 0.01, 36.9, srid=4326), city="Santa Cruz", state="CA", country="USA",
+            )
+            for i in range(3)
+        )
+
+    async def test_streams_from_an_async_iterator_under_asgi(self):
+        response = await self.async_client.get("/api/adopted-area-layer/geojson/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # Opening, one batch of features and closing, each sent as it is produced.
+        self.assertEqual(len(chunks), 3)
+        collection = json.loads(b"".join(chunks))
+        self.assertEqual(len(collection["features"]), 3)
+
+
+class ClusterBoundsTests(TestCase):
+    def test_high_zoom_needs_a_small_bbox(self):
+        self.assertEqual(self.client.get("/api/adopted-area-clusters/?z=3").status_code, 200)
+        self.assertEqual(self.client.get("/api/adopted-area-clusters/?z=12").status_code, 400)
+        self.assertEqual(self.client.get("/api/adopted-area-clusters/?z=12&bbox=-180,-90,180,90").status_code, 400)
+        self.assertEqual(self.client.get("/api/adopted-area-clusters/?z=12&bbox=-122.2,36.9,-122.0,37.1").status_code, 200)
+
+
+class AdoptionStatsTests(TestCase):
+    def totals(self):
+        response = self.client.get("/api/stats/adoptions/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["totals"]
+
+    def test_expired_and_deactivated_come_from_the_rollup(self):
+        user = User.objects.create_user(username="owner", email="owner@example.com", password="pw")
+        past = localdate() - datetime.timedelta(days=1)
+        future = localdate() + datetime.timedelta(days=30)
+        for fields in [
+            {},
+            {"is_active": False},
+            {"adoption_type": "temporary", "end_date": future, "is_active": False},
+            {"adoption_type": "temporary", "end_date": past},
+            {"adoption_type": "temporary", "end_date": past, "is_active": False},
+        ]:
+            create_areas(user, 1, **fields)
+
+        with self.assertNumQueries(2):
+            stats.grouped_stats("country")
+        # The past-end adoption still counts as active until api.expiry switches it off.
+        self.assertEqual(self.totals(), {"active": 2, "inactive": 3, "expired": 1, "deactivated": 2})
+        expiry.expire_adoptions()
+        self.assertEqual(self.totals(), {"active": 1, "inactive": 4, "expired": 2, "deactivated": 2})
+        self.assertEqual(stats.reconcile(), 0)
+
+
+class AdoptionEventTests(SimpleTestCase):
+    def test_rows_without_ids_send_one_sync_event(self):
+        areas = [AdoptedArea(location=Point(-122.0, 36.9, srid=4326)) for _ in range(3)]
+        self.assertEqual(events.area_events("created", areas), [events.sync_event()])
+
+    def test_moving_out_of_a_bbox_is_a_removal_there(self):
+        area = AdoptedArea(pk=1, revision=7, location=Point(-121.0, 36.9, srid=4326))
+        event = events.area_event("updated", area, previous_location=Point(-122.0, 36.9, srid=4326))
+        self.assertEqual((event["prev_lng"], event["prev_lat"]), (-122.0, 36.9))
+
+        old_view = events.Subscription((-122.1, 36.8, -121.9, 37.0), max_queue=1)
+        new_view = events.Subscription((-121.1, 36.8, -120.9, 37.0), max_queue=1)
+        elsewhere = events.Subscription((0.0, 0.0, 1.0, 1.0), max_queue=1)
+        self.assertEqual(old_view.event_for(event), {"type": "removed", "id": 1, "revision": 7, "lng": -121.0, "lat": 36.9})
+        self.assertIs(new_view.event_for(event), event)
+        self.assertIsNone(elsewhere.event_for(event))
+
+    def test_unmoved_updates_carry_no_previous_point(self):
+        area = AdoptedArea(pk=1, location=Point(-122.0, 36.9, srid=4326))
+        event = events.area_event("updated", area, previous_location=Point(-122.0, 36.9, srid=4326))
+        self.assertNotIn("prev_lng", event)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_latency_buckets_are_cumulative_and_inclusive(self):
+        for seconds in (0.005, 0.02, 0.02, 30.0):
+            metrics.observe_request("/teams/", "GET", 200, seconds, 1, 10)
+        text = metrics.render(metrics.collect())
+        labels = 'route="/teams/",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.01"}} 1', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.025"}} 3', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="10.0"}} 3', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4', text)
+        self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 4", text)
+
+    def test_unknown_methods_share_one_label(self):
+        metrics.observe_request("unmatched", "FOO", 405, 0.001, 0, 0)
+        metrics.observe_request("unmatched", "BAR", 405, 0.001, 0, 0)
+        (route, method, stats), = metrics.snapshot()["routes"]
+        self.assertEqual((route, method, stats[metrics.COUNT]), ("unmatched", "other", 2))
+
+    def test_collect_adds_up_worker_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        other = [0] * metrics.ROUTE_SLOTS
+        other[metrics.COUNT] = other[metrics.FIRST_BUCKET] = 2
+        with open(os.path.join(directory, "metrics-0.json"), "w") as f:
+            json.dump({"routes": [["/teams/", "GET", other]], "counters": {"auth_token_cache_hits_total": 5}}, f)
+        with open(os.path.join(directory, "metrics-2.json.tmp"), "w") as f:
+            f.write("half-written")
+
+        metrics.observe_request("/teams/", "GET", 200, 0.001, 1, 10)
+        metrics.increment("auth_token_cache_hits_total")
+        with self.settings(METRICS={**settings.METRICS, "MULTIPROCESS_DIR": directory}):
+            data = metrics.collect()
+
+        (route, method, stats), = data["routes"]
+        self.assertEqual((route, method, stats[metrics.COUNT], stats[metrics.FIRST_BUCKET]), ("/teams/", "GET", 3, 3))
+        self.assertEqual(data["counters"]["auth_token_cache_hits_total"], 6)
+
+    def test_endpoint_requires_a_token(self):
+        with self.settings(METRICS={**settings.METRICS, "TOKEN": None}):
+            self.assertEqual(self.client.get("/api/metrics").status_code, 403)
+        with self.settings(METRICS={**settings.METRICS, "TOKEN": "secret"}):
+            self.assertEqual(self.client.get("/api/metrics").status_code, 401)
+            response = self.client.get("/api/metrics", headers={"Authorization": "Bearer secret"})
+            self.assertEqual(response.status_code, 200)
+
+
+class RequestTimingTests(TestCase):
+    def timing_settings(self, **options):
+        return self.settings(REQUEST_TIMING={
+            **settings.REQUEST_TIMING, "ENABLED": True, "HEADER": True, "SAMPLE_RATE": 1.0, "SLOW_MS": 60_000, **options,
+        })
+
+    def test_server_timing_header(self):
+        with self.timing_settings():
+            response = self.client.get("/api/teams/")
+        self.assertRegex(
+            response.headers["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="[1-9]\d* queries", ser;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+
+    def test_route_over_the_query_limit_logs_a_warning(self):
+        with self.timing_settings(MAX_QUERIES=0), self.assertLogs("api.timing", "INFO") as logs:
+            self.client.get("/api/teams/")
+        record, = logs.records
+        self.assertEqual(record.levelname, "WARNING")
+        self.assertIn("status=200", record.getMessage())
+        self.assertIn("flags=many_queries", record.getMessage())
+
+    def test_route_under_the_limits_logs_info(self):
+        with self.timing_settings(MAX_QUERIES=1000), self.assertLogs("api.timing", "INFO") as logs:
+            self.client.get("/api/teams/")
+        record, = logs.records
+        self.assertEqual(record.levelname, "INFO")
+        self.assertIn("flags=-", record.getMessage())
+
+
+class AsgiMiddlewareTests(SimpleTestCase):
+    def test_middleware_chain_is_not_adapted(self):
+        # Django logs "Asynchronous handler adapted for ..." for every sync-only middleware.
+        with self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
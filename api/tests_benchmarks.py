@@ -0,0 +1,260 @@
+"""Endpoint benchmarks with query-count, response-size and latency regression gates.
+
+Skipped unless API_BENCHMARKS=1, as they seed tens of thousands of rows:
+
+    API_BENCHMARKS=1 python manage.py test api.tests_benchmarks
+
+Every case in CASES is measured at each scale in API_BENCHMARK_SCALES (adoptions;
+teams are a tenth of that) and the results are written to API_BENCHMARK_RESULTS. A
+case fails if it issues more queries than the baseline, returns more than
+BYTES_TOLERANCE more bytes, or its median latency grows by more than
+API_BENCHMARK_TOLERANCE (plus LATENCY_SLACK_MS, so sub-millisecond noise never
+fails). Cases missing from the baseline, or a missing baseline file, fail too.
+
+Run with API_BENCHMARK_UPDATE=1 to record a new baseline instead, on the machine the
+gates run on, and commit it:
+
+    API_BENCHMARKS=1 API_BENCHMARK_UPDATE=1 python manage.py test api.tests_benchmarks
+"""
+import itertools
+import json
+import os
+import time
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from . import sync
+from .benchmarking import percentiles, seed_adopted_areas
+from .models import AdoptedArea, Team
+
+User = get_user_model()
+
+ENABLED = os.getenv("API_BENCHMARKS") == "1"
+SCALES = [int(scale) for scale in os.getenv("API_BENCHMARK_SCALES", "100,1000,10000").split(",")]
+REPEAT = int(os.getenv("API_BENCHMARK_REPEAT", 20))
+BASELINE_PATH = os.getenv("API_BENCHMARK_BASELINE", os.path.join(os.path.dirname(__file__), "benchmark_baseline.json"))
+RESULTS_PATH = os.getenv("API_BENCHMARK_RESULTS", "benchmark-results.json")
+UPDATE_BASELINE = os.getenv("API_BENCHMARK_UPDATE") == "1"
+LATENCY_TOLERANCE = float(os.getenv("API_BENCHMARK_TOLERANCE", 0.5))
+LATENCY_SLACK_MS = 1.0
+BYTES_TOLERANCE = 0.1
+
+# Seeded adoptions fall in EXTENT; adoptions created by the benchmark go on a grid far
+# away from them so the spacing check never rejects one.
+EXTENT = (-122.6, 36.5, -121.6, 37.5)
+BBOX = "-122.2,36.9,-122.0,37.1"
+TEAM_MEMBERS = 20
+
+_new_spots = itertools.count()
+
+
+def adoption_body(**overrides):
+    n = next(_new_spots)
+    body = {
+        "area_name": f"Benchmark spot {n}",
+        "adoptee_name": "Benchmark",
+        "email": "benchmark@example.com",
+        "location": {"type": "Point", "coordinates": [-60 + (n % 1000) * 0.01, -40 + (n // 1000) * 0.01]},
+        "city": "Bench",
+        "state": "Bench",
+        "country": "Bench",
+    }
+    body.update(overrides)
+    return body
+
+
+class Case:
+    """One request to measure; ``prepare`` runs untimed before every call and returns its path and body."""
+
+    def __init__(self, name, method, path, prepare=None, status=200):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.prepare = prepare or (lambda bench: (self.path, None))
+        self.status = status
+
+
+def _own_area(bench):
+    area = AdoptedArea.objects.create(
+        user=bench.user, location=Point(-50, -50 + next(_new_spots) * 1e-3, srid=4326), **bench.area_fields
+    )
+    return f"/api/adopt-area/{area.pk}/"
+
+
+def _update_area(bench):
+    return f"/api/adopt-area/{bench.area.pk}/", adoption_body()
+
+
+def _join(bench):
+    bench.other_team.members.remove(bench.user)
+    return f"/api/teams/{bench.other_team.pk}/join", None
+
+
+def _leave(bench):
+    bench.other_team.members.add(bench.user)
+    return f"/api/teams/{bench.other_team.pk}/leave", None
+
+
+def _add_leader(bench):
+    bench.team.leaders.remove(bench.member)
+    return f"/api/teams/{bench.team.pk}/add_leader/", {"user_id": bench.member.pk}
+
+
+def _remove_leader(bench):
+    bench.team.leaders.add(bench.member)
+    return f"/api/teams/{bench.team.pk}/remove_leader/", {"user_id": bench.member.pk}
+
+
+CASES = [
+    Case("layer", "get", "/api/adopted-area-layer/"),
+    Case("layer_bbox", "get", f"/api/adopted-area-layer/?bbox={BBOX}"),
+    Case("layer_page", "get", "/api/adopted-area-layer/?limit=500"),
+    Case("layer_geojson", "get", "/api/adopted-area-layer/geojson/"),
+    Case("layer_changes", "get", None, prepare=lambda bench: (f"/api/adopted-area-layer/changes/?since={bench.sync_token}", None)),
+    Case("clusters", "get", f"/api/adopted-area-clusters/?z=8&bbox={','.join(map(str, EXTENT))}"),
+    Case("nearby", "get", "/api/adopted-areas/nearby/?lng=-122.1&lat=37.0&radius_m=5000"),
+    Case("stats", "get", "/api/stats/adoptions/?group_by=city"),
+    Case("search", "get", "/api/search/?q=spot%2042"),
+    Case("tile", "get", "/api/tiles/10/164/395.mvt"),
+    Case("teams", "get", "/api/teams/"),
+    Case("teams_counts", "get", "/api/teams/?include=counts"),
+    Case("team", "get", None, prepare=lambda bench: (f"/api/teams/{bench.team.pk}/", None)),
+    Case("adopt", "post", None, prepare=lambda bench: ("/api/adopt-area/", adoption_body()), status=201),
+    Case("adopt_bulk", "post", None, status=201, prepare=lambda bench: (
+        "/api/adopt-area/bulk/", {"items": [adoption_body() for _ in range(50)]},
+    )),
+    Case("update", "put", None, prepare=_update_area),
+    Case("delete", "delete", None, prepare=lambda bench: (_own_area(bench), None)),
+    Case("create_team", "post", None, prepare=lambda bench: ("/api/teams/", {
+        "name": "Benchmark team",
+        "description": "",
+        "headquarters": {"type": "Point", "coordinates": [-122.0, 37.0]},
+    })),
+    Case("join_team", "post", None, prepare=_join),
+    Case("leave_team", "post", None, prepare=_leave),
+    Case("add_leader", "post", None, prepare=_add_leader),
+    Case("remove_leader", "post", None, prepare=_remove_leader),
+]
+
+
+def response_bytes(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def regressions(name, result, baseline):
+    """Messages for every gate ``result`` fails against ``baseline``."""
+    problems = []
+    if result["queries"] > baseline["queries"]:
+        problems.append(f"{name}: {result['queries']} queries, baseline {baseline['queries']}")
+    if result["bytes"] > baseline["bytes"] * (1 + BYTES_TOLERANCE):
+        problems.append(f"{name}: {result['bytes']} bytes, baseline {baseline['bytes']}")
+    allowed_ms = baseline["p50_ms"] * (1 + LATENCY_TOLERANCE) + LATENCY_SLACK_MS
+    if result["p50_ms"] > allowed_ms:
+        problems.append(f"{name}: p50 {result['p50_ms']:.2f} ms, baseline {baseline['p50_ms']:.2f} ms")
+    return problems
+
+
+@unittest.skipUnless(ENABLED, "Set API_BENCHMARKS=1 to run the endpoint benchmarks.")
+class EndpointBenchmarks(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="benchmark", email="benchmark@example.com", password="pw")
+        cls.members = [
+            User.objects.create_user(username=f"member{i}", email=f"member{i}@example.com", password="pw")
+            for i in range(TEAM_MEMBERS)
+        ]
+        cls.member = cls.members[0]
+        cls.area_fields = {
+            "area_name": "Benchmark spot", "adoptee_name": "Benchmark", "email": cls.user.email,
+            "city": "Bench", "state": "Bench", "country": "Bench",
+        }
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # require_auth reads the token header; remove_leader uses the session cookie.
+        self.headers = {"X-Session-Token": self.client.session.session_key}
+        self.area = AdoptedArea.objects.create(user=self.user, location=Point(-50, -60, srid=4326), **self.area_fields)
+        self.teams = 0
+        self.seeded = 0
+
+    def grow_to(self, scale):
+        seed_adopted_areas(scale - self.seeded, EXTENT, self.members[-1], seed=scale)
+        self.seeded = scale
+        team_count = max(2, scale // 10)
+        teams = []
+        for i in range(self.teams, team_count):
+            team = Team.objects.create(name=f"Team {i}", headquarters=Point(-122.0 + (i % 100) * 0.005, 37.0, srid=4326))
+            teams.append(team)
+            team.members.add(*self.members)
+            team.leaders.add(self.members[i % TEAM_MEMBERS])
+        self.teams = max(self.teams, team_count)
+        if not hasattr(self, "team"):
+            self.team, self.other_team = teams[0], teams[1]
+            self.team.members.add(self.user)
+            self.team.leaders.add(self.user)
+        self.sync_token = sync.encode_token(max(sync.current_revision() - 100, 0))
+
+    def call(self, case):
+        path, body = case.prepare(self)
+        kwargs = {"headers": self.headers}
+        if body is not None:
+            kwargs.update(data=json.dumps(body), content_type="application/json")
+        started = time.perf_counter()
+        response = getattr(self.client, case.method)(path, **kwargs)
+        size = response_bytes(response)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, case.status, case.name)
+        return elapsed_ms, size
+
+    def measure(self, case):
+        for _ in range(3):
+            self.call(case)
+        with CaptureQueriesContext(connection) as queries:
+            _, size = self.call(case)
+        stats = percentiles([self.call(case)[0] for _ in range(REPEAT)])
+        return {
+            "queries": len(queries),
+            "bytes": size,
+            "p50_ms": round(stats["p50"], 3),
+            "p95_ms": round(stats["p95"], 3),
+            "mean_ms": round(stats["mean"], 3),
+        }
+
+    def test_endpoints(self):
+        baseline = {}
+        if not UPDATE_BASELINE:
+            if not os.path.exists(BASELINE_PATH):
+                self.fail(
+                    f"No benchmark baseline at {BASELINE_PATH}. Record one with API_BENCHMARK_UPDATE=1 and commit it."
+                )
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+
+        results, problems = {}, []
+        for scale in sorted(SCALES):
+            self.grow_to(scale)
+            results[str(scale)] = scale_results = {}
+            for case in CASES:
+                scale_results[case.name] = result = self.measure(case)
+                if UPDATE_BASELINE:
+                    continue
+                expected = baseline.get(str(scale), {}).get(case.name)
+                if expected:
+                    problems.extend(regressions(f"{case.name} @ {scale}", result, expected))
+                else:
+                    problems.append(f"{case.name} @ {scale}: not in the baseline, record it with API_BENCHMARK_UPDATE=1")
+
+        with open(RESULTS_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        if UPDATE_BASELINE:
+            with open(BASELINE_PATH, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        if problems:
+            self.fail("Benchmark regressions:\n" + "\n".join(problems))
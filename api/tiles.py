@@ -0,0 +1,83 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.timezone import localdate
+
+from .models import AdoptedArea, Team
+from .proximity import NOT_EXPIRED
+
+MAX_ZOOM = 22
+
+# Both layers are rendered by PostGIS in one round trip; concatenated MVT layers form a valid tile.
+TILE_SQL = f"""
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom
+),
+adopted_areas AS (
+    SELECT ST_AsMVTGeom(ST_Transform(a.location, 3857), bounds.geom) AS geom,
+           a.id, a.area_name, a.adoptee_name, a.city, a.state, a.country
+    FROM {AdoptedArea._meta.db_table} a, bounds
+    WHERE a.is_active AND {NOT_EXPIRED.format("a.")} AND a.location && ST_Transform(bounds.geom, 4326)
+),
+teams AS (
+    SELECT ST_AsMVTGeom(ST_Transform(t.headquarters, 3857), bounds.geom) AS geom,
+           t.id, t.name, t.city, t.state, t.country
+    FROM {Team._meta.db_table} t, bounds
+    WHERE t.headquarters && ST_Transform(bounds.geom, 4326)
+)
+SELECT COALESCE((SELECT ST_AsMVT(adopted_areas.*, 'adopted_areas') FROM adopted_areas), '')
+    || COALESCE((SELECT ST_AsMVT(teams.*, 'teams') FROM teams), '')
+"""
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_for_point(lng, lat, z):
+    """Return the ``(x, y)`` web mercator tile containing a WGS84 point at zoom ``z``."""
+    lat = max(min(lat, 85.0511), -85.0511)
+    n = 2 ** z
+    x = int((lng + 180) / 360 * n)
+    lat_rad = math.radians(lat)
+    y = int((1 - math.asinh(math.tan(lat_rad)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_cache_key(z, x, y):
+    return f"tiles:mvt:{z}:{x}:{y}"
+
+
+def render_tile(z, x, y):
+    with connection.cursor() as cursor:
+        cursor.execute(TILE_SQL, {"z": z, "x": x, "y": y, "today": localdate()})
+        return bytes(cursor.fetchone()[0])
+
+
+def get_tile(z, x, y):
+    if z > settings.TILE_CACHE_MAX_ZOOM:
+        return render_tile(z, x, y)
+
+    key = tile_cache_key(z, x, y)
+    tile = cache.get(key)
+    if tile is None:
+        tile = render_tile(z, x, y)
+        cache.set(key, tile, settings.TILE_CACHE_TIMEOUT)
+    return tile
+
+
+def invalidate_points(points):
+    """Drop the cached tiles that contain any of the given points, at every cached zoom.
+
+    CACHES is shared, so this reaches the tiles cached by every process.
+    """
+    keys = {
+        tile_cache_key(z, *tile_for_point(point.x, point.y, z))
+        for point in points
+        if point is not None
+        for z in range(settings.TILE_CACHE_MAX_ZOOM + 1)
+    }
+    if keys:
+        cache.delete_many(keys)
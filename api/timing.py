@@ -0,0 +1,135 @@
+"""Per-request SQL and latency measurements, reported by api.middleware.RequestTimingMiddleware.
+
+A RequestTiming is held in a context variable for the request, so it follows async views
+into sync_to_async threads. Every database connection gets an execute wrapper that adds
+the query count and time to it, and JSON encoding (the Ninja renderer and
+geojson.dumps) adds serialization time. Outside a sampled request the context variable
+is empty and the hooks cost one lookup. When REQUEST_TIMING["ENABLED"] is off they are
+never installed.
+"""
+import logging
+import time
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from ninja.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+current = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    __slots__ = ("started", "queries", "db_ms", "serialize_ms")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def start():
+    """Begin measuring the current request; returns the token for ``finish``.
+
+    When the request is already being measured (metrics and timing middleware both
+    installed) the inner caller shares that measurement and gets None.
+    """
+    if current.get() is not None:
+        return None
+    return current.set(RequestTiming())
+
+
+def finish(token):
+    timing = current.get()
+    if token is not None:
+        current.reset(token)
+    return timing
+
+
+class serialization:
+    """Context manager that adds its duration to the request's serialization time."""
+
+    __slots__ = ("timing", "started")
+
+    def __enter__(self):
+        self.timing = current.get()
+        if self.timing is not None:
+            self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.timing is not None:
+            self.timing.serialize_ms += (time.perf_counter() - self.started) * 1000
+
+
+def count_query(execute, sql, params, many, context):
+    timing = current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.queries += 1
+        timing.db_ms += (time.perf_counter() - started) * 1000
+
+
+def _wrap_connection(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def install():
+    """Add the query counter to open database connections and every one opened later."""
+    connection_created.connect(_wrap_connection, dispatch_uid="api.timing")
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(None, connection)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, request, data, *, response_status):
+        with serialization():
+            return super().render(request, data, response_status=response_status)
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    return f"/{match.route}" if match is not None else request.path_info
+
+
+def server_timing(timing, total_ms):
+    return (
+        f'db;dur={timing.db_ms:.1f};desc="{timing.queries} queries", '
+        f"ser;dur={timing.serialize_ms:.1f}, "
+        f"total;dur={total_ms:.1f}"
+    )
+
+
+def report(request, response, timing, options):
+    """Add the Server-Timing header and log the measurements of one request."""
+    total_ms = timing.total_ms()
+    if options["HEADER"]:
+        response["Server-Timing"] = server_timing(timing, total_ms)
+
+    flags = []
+    if timing.queries > options["MAX_QUERIES"]:
+        flags.append("many_queries")
+    if total_ms > options["SLOW_MS"]:
+        flags.append("slow")
+    # One key=value line per request so the log can be grepped or parsed.
+    logger.log(
+        logging.WARNING if flags else logging.INFO,
+        "method=%s route=%s status=%s queries=%d db_ms=%.1f ser_ms=%.1f total_ms=%.1f flags=%s",
+        request.method,
+        route_name(request),
+        response.status_code,
+        timing.queries,
+        timing.db_ms,
+        timing.serialize_ms,
+        total_ms,
+        ",".join(flags) or "-",
+    )
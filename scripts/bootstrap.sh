@@ -71,6 +71,7 @@ services:
       python manage.py collectstatic --no-input
     startCommand: |
       python manage.py migrate --no-input &&
+      python manage.py createcachetable &&
       gunicorn WebGIS.asgi:application -k uvicorn.workers.UvicornWorker
 
     envVars:
@@ -145,6 +146,7 @@ pip install -r requirements.txt
 echo "⚙️ Applying Django migrations..."
 export DJANGO_SETTINGS_MODULE=$DJANGO_PROJ.settings
 python manage.py migrate
+python manage.py createcachetable
 
 echo "👤 Creating Django superuser..."
 python manage.py shell <<EOF
@@ -0,0 +1,24 @@
+#!/bin/bash
+# Load-test the same endpoint under gunicorn sync workers and under uvicorn (async views).
+# Usage: scripts/compare_servers.sh [path] [concurrency] [duration]
+set -e
+
+PATH_UNDER_TEST=${1:-"/api/adopted-area-layer/?bbox=-122.10,36.90,-121.90,37.00&limit=200"}
+CONCURRENCY=${2:-500}
+DURATION=${3:-30}
+WORKERS=${WORKERS:-4}
+PORT=8765
+
+run() {
+  local label=$1; shift
+  "$@" &
+  local pid=$!
+  sleep 3
+  python manage.py benchmark_load "http://127.0.0.1:${PORT}${PATH_UNDER_TEST}" \
+    --concurrency "$CONCURRENCY" --duration "$DURATION" --label "$label" || true
+  kill "$pid"
+  wait "$pid" 2>/dev/null || true
+}
+
+run "gunicorn sync" gunicorn WebGIS.wsgi:application -w "$WORKERS" -k sync -b "127.0.0.1:${PORT}" --log-level warning
+run "uvicorn async" uvicorn WebGIS.asgi:application --workers "$WORKERS" --port "$PORT" --log-level warning